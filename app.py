@@ -1,12 +1,15 @@
+import time
+from uuid import uuid4
+
 import streamlit as st
-import numpy as np
-from io import BytesIO
-from scipy.io.wavfile import write
-import base64
 
 # Modules internes
 from synth.engine import render_note
-from sequencer.stepseq import seq_multi_track
+from synth.disk_cache import DISK_CACHE, request_key
+from synth.encoding import encode_audio, encode_blocks, extension, mime_type
+from synth.jobs import JOBS
+from synth.render_client import RENDER_POOL, RenderError
+from synth.looping import loop_region
 from ui.piano_component import piano_component
 
 
@@ -25,55 +28,117 @@ if "looping" not in st.session_state:
 if "loop_wave" not in st.session_state:
     st.session_state.loop_wave = None
 
+# Clé du cycle de boucle dans le cache disque
+if "loop_key" not in st.session_state:
+    st.session_state.loop_key = None
+
+# Rendus en tâche de fond : un job par emplacement ("sequence", "brainwave")
+if "jobs" not in st.session_state:
+    st.session_state.session_id = uuid4().hex
+    st.session_state.jobs = {}
+
 
 ###############################################################################
 # AUDIO SYSTEM
 ###############################################################################
 
-def float_to_int16(wave):
-    return (wave * 32767).astype(np.int16)
+# Écoute : Ogg Vorbis (5–20× plus léger qu'un WAV base64) ; export : FLAC
+LISTEN_FORMAT = "listen"
+ANALYSIS_FORMAT = "analysis"
+
+
+def encoded_audio(wave, key=None, fmt=LISTEN_FORMAT, sample_rate=SAMPLE_RATE):
+    """Fichier compressé, partagé via le cache disque quand le rendu a une clé."""
+    if key is None:
+        return encode_audio(wave, sample_rate, fmt)
+    return DISK_CACHE.payload(key, extension(fmt, sample_rate), lambda: encode_audio(wave, sample_rate, fmt))
+
 
+def cached_wave(key, render_fn):
+    """Rendu PCM partagé entre sessions (cache disque adressé par contenu)."""
+    return DISK_CACHE.array(key, render_fn)
 
-def play_once(wave, sample_rate=SAMPLE_RATE):
-    """Lecture d'un son en one-shot via HTML5 autoplay."""
-    wave16 = float_to_int16(wave)
-    buf = BytesIO()
-    write(buf, sample_rate, wave16)
-    buf.seek(0)
 
-    b64 = base64.b64encode(buf.read()).decode()
-    html = f"""
-    <audio autoplay>
-        <source src="data:audio/wav;base64,{b64}" type="audio/wav">
-    </audio>
+def note_wave(key, freq, dur, params):
+    """
+    render_note via le démon de rendu partagé s'il tourne
+    (python -m synth.render_daemon), sinon dans ce processus.
+    """
+    try:
+        with RENDER_POOL.connection() as daemon:
+            return daemon.render_note(freq, dur, params, SAMPLE_RATE)
+    except (OSError, RenderError):
+        return cached_wave(key, lambda: render_note(freq, dur, params))
+
+
+def background_job(slot, key, fn):
+    """
+    Lance fn(progress) dans le pool partagé, ou rejoint le même rendu déjà
+    en cours dans une autre session. Le job précédent de l'emplacement est
+    abandonné (voir release_job).
+    """
+    job = JOBS.submit(key, fn, session=st.session_state.session_id)
+    release_job(slot, keep=job)
+    st.session_state.jobs[slot] = job
+    return job
+
+
+def release_job(slot, keep=None):
+    """Abandonne le job de l'emplacement : annulé si plus aucune session ne l'attend."""
+    previous = st.session_state.jobs.pop(slot, None)
+    if previous is not None and previous is not keep:
+        JOBS.release(previous, st.session_state.session_id)
+
+
+def await_job(job, label):
+    """Résultat du job, ou barre de progression puis rerun dans 0,3 s."""
+    if job.done() and job.result() is not None:
+        return job.result()
+    st.progress(job.progress, text=f"{label} — {job.progress:.0%}")
+    time.sleep(0.3)
+    st.rerun()
+
+
+def cached_wave_async(slot, key, render_fn, label="Rendu"):
+    """
+    cached_wave sans bloquer la session : un miss est rendu en tâche de
+    fond par render_fn(progress) et la page se rafraîchit jusqu'au résultat.
+    """
+    wave = DISK_CACHE.read_array(key)
+    if wave is not None:
+        release_job(slot)
+        return wave
+    job = background_job(slot, key, lambda progress: cached_wave(key, lambda: render_fn(progress)))
+    return await_job(job, label)
+
+
+def play_once(wave, sample_rate=SAMPLE_RATE, key=None):
+    """
+    Lecture one-shot. st.audio sert le fichier par URL (media manager de
+    Streamlit) : seul le lien passe par le websocket.
     """
-    st.markdown(html, unsafe_allow_html=True)
+    data = encoded_audio(wave, key, sample_rate=sample_rate)
+    st.audio(data, format=mime_type(LISTEN_FORMAT, sample_rate), autoplay=True)
 
 
 def play_loop_infinite():
-    """Lit st.session_state.loop_wave en boucle infinie."""
+    """
+    Lit st.session_state.loop_wave en boucle infinie : un seul cycle est
+    encodé, la répétition est faite par le navigateur (attribut loop).
+    """
     wave = st.session_state.loop_wave
     if wave is None:
         return
 
-    wave16 = float_to_int16(wave)
-    buf = BytesIO()
-    write(buf, SAMPLE_RATE, wave16)
-    buf.seek(0)
-    b64 = base64.b64encode(buf.read()).decode()
-
-    html = f"""
-    <audio autoplay loop>
-        <source src="data:audio/wav;base64,{b64}" type="audio/wav">
-    </audio>
-    """
-    st.markdown(html, unsafe_allow_html=True)
+    data = encoded_audio(wave, st.session_state.loop_key)
+    st.audio(data, format=mime_type(LISTEN_FORMAT), autoplay=True, loop=True)
 
 
 def stop_audio():
     """Stop immédiat."""
     st.session_state.looping = False
     st.session_state.loop_wave = None
+    st.session_state.loop_key = None
     st.markdown("<audio></audio>", unsafe_allow_html=True)
     st.success("Lecture arrêtée.")
 
@@ -94,11 +159,20 @@ def midi_to_freq(midi):
     return diapason * (2 ** ((midi - 69) / 12))
 
 
+def start_loop(wave, key, freq=None):
+    """Découpe (ou relit en cache) le cycle de boucle puis le joue."""
+    loop_key = request_key("loop_region", source=key, freq=freq, sr=SAMPLE_RATE)
+    st.session_state.looping = True
+    st.session_state.loop_key = loop_key
+    st.session_state.loop_wave = cached_wave(loop_key, lambda: loop_region(wave, SAMPLE_RATE, freq))
+    play_loop_infinite()
+
+
 ###############################################################################
 # NAVIGATION
 ###############################################################################
 
-section = st.sidebar.selectbox("Section", ["Synth", "Piano", "Séquenceur"])
+section = st.sidebar.selectbox("Section", ["Synth", "Piano", "Séquenceur", "Brainwave"])
 
 
 ###############################################################################
@@ -123,11 +197,13 @@ if section == "Synth":
         volume=1.0,
     )
 
+    key = request_key("render_note", freq=freq, dur=duration, params=params, sr=SAMPLE_RATE)
+
     # PLAY ONESHOT
     if st.button("▶️ Jouer"):
         st.session_state.looping = False
-        wave = render_note(freq, duration, params)
-        play_once(wave)
+        wave = note_wave(key, freq, duration, params)
+        play_once(wave, key=key)
 
     # TOGGLE BOUCLE / STOP
     toggle = st.button("🔁 Boucle infinie" if not st.session_state.looping else "⏹️ Stop")
@@ -135,11 +211,8 @@ if section == "Synth":
     if toggle:
         # ACTIVER BOUCLE
         if not st.session_state.looping:
-            st.session_state.looping = True
-            wave = render_note(freq, duration, params)
-            long = np.tile(wave, 2000)
-            st.session_state.loop_wave = long
-            play_loop_infinite()
+            wave = note_wave(key, freq, duration, params)
+            start_loop(wave, key, freq)
 
         # STOP
         else:
@@ -180,21 +253,19 @@ elif section == "Piano":
             volume=1.0,
         )
 
-        wave = render_note(freq, 1.0, params)
+        key = request_key("render_note", freq=freq, dur=1.0, params=params, sr=SAMPLE_RATE)
+        wave = note_wave(key, freq, 1.0, params)
 
         # PLAY
         st.session_state.looping = False
-        play_once(wave)
+        play_once(wave, key=key)
 
         # TOGGLE BOUCLE / STOP
         toggle = st.button("🔁 Boucle infinie (piano)" if not st.session_state.looping else "⏹️ Stop")
 
         if toggle:
             if not st.session_state.looping:
-                st.session_state.looping = True
-                long = np.tile(wave, 2000)
-                st.session_state.loop_wave = long
-                play_loop_infinite()
+                start_loop(wave, key, freq)
             else:
                 stop_audio()
 
@@ -204,17 +275,27 @@ elif section == "Piano":
 ###############################################################################
 
 elif section == "Séquenceur":
+    # Chargés à la première visite de la section (mido, moteur de séquence)
+    from sequencer.stepseq import IncrementalSequencer
+    from sequencer.export_midi import patterns_to_midi, midi_to_bytes
+
     st.header("Séquenceur — Boucle infinie ⟷ Stop — Accordage 432 Hz")
 
+    # Séquenceur persistant : seuls les pas modifiés sont re-rendus
+    if "sequencer" not in st.session_state:
+        st.session_state.sequencer = IncrementalSequencer()
+
     note_list = ["C4","D4","E4","F4","G4","A4","B4"]
 
     names = ["C","C#","D","D#","E","F","F#","G","G#","A","A#","B"]
     freq_map = {}
+    note_map = {}   # même numérotation pour l'audio et l'export MIDI
 
     for n in note_list:
         name = n[:-1]
         octave = int(n[-1])
         midi = names.index(name) + octave * 12
+        note_map[n] = midi
         freq_map[n] = midi_to_freq(midi)
 
     patterns = {"track1": [note_list[i % 7] for i in range(16)]}
@@ -232,22 +313,97 @@ elif section == "Séquenceur":
 
     bpm = st.slider("BPM", 40, 200, 120)
 
-    # On génère la séquence ici (une seule fois par run)
-    wave = seq_multi_track(patterns, freq_map, bpm, params_tracks)
+    # Séquence déjà rendue (toutes sessions confondues) : relue sur disque ;
+    # sinon rendu incrémental, seuls les pas modifiés depuis le dernier run
+    key = request_key(
+        "seq_multi_track", patterns=patterns, freq_map=freq_map, bpm=bpm,
+        params=params_tracks, sr=SAMPLE_RATE,
+    )
+    sequencer = st.session_state.sequencer
+    wave = cached_wave_async(
+        "sequence", key,
+        lambda progress: sequencer.render(patterns, freq_map, bpm, params_tracks, progress=progress),
+        "Rendu de la séquence",
+    )
 
     # PLAY
     if st.button("▶️ Jouer séquence"):
         st.session_state.looping = False
-        play_once(wave)
+        play_once(wave, key=key)
+
+    # EXPORT AUDIO SANS PERTE (FLAC, pour l'analyse)
+    st.download_button(
+        "⬇️ Export FLAC",
+        data=encoded_audio(wave, key, ANALYSIS_FORMAT),
+        file_name="sequence.flac",
+        mime=mime_type(ANALYSIS_FORMAT),
+    )
+
+    # EXPORT PARTITION (MIDI, sans rendu audio)
+    midi_key = request_key("patterns_to_midi", patterns=patterns, bpm=bpm, note_map=note_map, freq_map=freq_map)
+    st.download_button(
+        "⬇️ Export MIDI",
+        data=DISK_CACHE.payload(midi_key, ".mid", lambda: midi_to_bytes(
+            patterns_to_midi(patterns, bpm, note_map=note_map, freq_map=freq_map)
+        )),
+        file_name="sequence.mid",
+        mime="audio/midi",
+    )
 
     # TOGGLE LOOP / STOP
     toggle = st.button("🔁 Boucle infinie (seq)" if not st.session_state.looping else "⏹️ Stop")
 
     if toggle:
         if not st.session_state.looping:
-            st.session_state.looping = True
-            long = np.tile(wave, 2000)
-            st.session_state.loop_wave = long
-            play_loop_infinite()
+            start_loop(wave, key)
         else:
             stop_audio()
+
+
+###############################################################################
+# SECTION BRAINWAVE (streaming progressif)
+###############################################################################
+
+elif section == "Brainwave":
+    from synth.brainwave_engine import brainwave_stream
+    from synth.brainwave_presets import BRAINWAVE_PRESETS_PRO
+    from synth.stream_server import server_running, stream_url
+
+    st.header("Sessions Brainwave — streaming progressif")
+
+    names = [p["name"] for p in BRAINWAVE_PRESETS_PRO]
+    index = st.selectbox("Preset", range(len(names)), format_func=lambda i: names[i])
+    preset = BRAINWAVE_PRESETS_PRO[index]
+    st.write(f"Mode : **{preset['mode']}** — durée : **{preset['duration'] / 60:.0f} min**")
+
+    # rendu bloc par bloc par le serveur de streaming : lecture immédiate, seek par Range
+    if server_running():
+        st.audio(stream_url("/brainwave", preset=str(index)), format="audio/wav")
+    else:
+        st.warning(
+            "Serveur de streaming injoignable : lancer `python -m synth.stream_server` "
+            "(URL publique : `CYMATICS_STREAM_URL`), ou préparer le FLAC ci-dessous."
+        )
+
+    # Session complète en FLAC, rendue en tâche de fond ; changer de preset
+    # abandonne le rendu en cours
+    flac_key = request_key("brainwave_flac", preset=preset, volume=0.8, sr=SAMPLE_RATE)
+    if st.button("💾 Préparer le FLAC de la session"):
+        st.session_state.brainwave_export = flac_key
+
+    if st.session_state.get("brainwave_export") == flac_key:
+        data = DISK_CACHE.read_bytes(flac_key, ".flac")
+        if data is None:
+            job = background_job("brainwave", flac_key, lambda progress: DISK_CACHE.payload(
+                flac_key, ".flac",
+                lambda: encode_blocks(brainwave_stream([preset], progress=progress), 2, SAMPLE_RATE, ANALYSIS_FORMAT),
+            ))
+            data = await_job(job, "Rendu FLAC")
+        st.download_button(
+            "⬇️ Télécharger le FLAC",
+            data=data,
+            file_name=f"{preset['name']}.flac",
+            mime=mime_type(ANALYSIS_FORMAT),
+        )
+    else:
+        release_job("brainwave")
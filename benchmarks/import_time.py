@@ -0,0 +1,94 @@
+"""
+Temps d'import des points d'entrée (python -X importtime).
+
+    python -m benchmarks.import_time [--repeat 3] [--top 5]
+
+Chaque module est importé dans un interpréteur neuf où numpy et streamlit
+sont déjà chargés : seul ce que le module ajoute est compté. Code de
+sortie 1 si un module charge au démarrage une dépendance lourde (HEAVY)
+qu'il n'a pas le droit de charger — elles ne doivent l'être qu'à la
+première utilisation de la section qui en a besoin.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("matplotlib", "plotly", "scipy", "librosa", "pydub", "mido", "soundfile")
+
+# module → dépendances lourdes autorisées à l'import
+TARGETS = {
+    "app": (),
+    "app_modular": (),
+    "synth.engine": (),
+    "synth.encoding": (),
+    "synth.brainwave_engine": (),
+    "synth.stream_server": (),
+    "synth.render_client": (),
+    "sequencer.stepseq": (),
+    "sequencer.export_midi": ("mido",),
+    "ui.plot_cache": (),
+    "ui.visualizer": (),
+    "ui.harmonic_analyzer": (),
+    "ui.harmonic_live": (),
+}
+
+MARKER = "--- import_time ---"
+
+
+def import_profile(module):
+    """
+    [(nom, self µs, cumulé µs, profondeur)] des modules ajoutés par
+    l'import de module (sortie de -X importtime après le marqueur).
+    """
+    code = f"import sys, numpy, streamlit; print({MARKER!r}, file=sys.stderr); import {module}"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} : {proc.stderr.strip().splitlines()[-1]}")
+
+    entries = []
+    lines = proc.stderr.split(MARKER, 1)[-1].splitlines()
+    for line in lines:
+        if not line.startswith("import time:") or "| imported package" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(own), int(cumulative), depth))
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=0, help="modules les plus lents par cible")
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<24} {'ms':>8} {'modules':>8}  lourds")
+    failed = []
+    for module, allowed in TARGETS.items():
+        runs = [import_profile(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda entries: sum(c for _, _, c, d in entries if d == 0))
+        total = sum(c for _, _, c, d in best if d == 0)
+
+        loaded = sorted({name.split(".")[0] for name, _, _, _ in best} & set(HEAVY))
+        forbidden = [name for name in loaded if name not in allowed]
+        if forbidden:
+            failed.append(f"{module} ({', '.join(forbidden)})")
+        print(f"{module:<24} {total/1e3:8.1f} {len(best):8d}  {', '.join(loaded) or '-'}")
+
+        for name, own, _, _ in sorted(best, key=lambda e: -e[1])[:args.top]:
+            print(f"    {name:<36} {own/1e3:8.1f}")
+
+    if failed:
+        print(f"dépendances lourdes chargées à l'import : {'; '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+float32 (pipeline par défaut) vs float64 (référence).
+
+    python -m benchmarks.precision [--seconds 30] [--repeat 3]
+
+Pour chaque rendu : temps (meilleur de --repeat), pic mémoire numpy
+(tracemalloc) et écart max |float32 - float64|. Code de sortie 1 si un
+écart dépasse MAX_ERROR (≈ -80 dBFS, sous le pas d'un int16).
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from synth.precision import precision
+from synth.engine import render_note, render_chord
+from synth.brainwave_engine import brainwave_sequence
+from synth.lfo import lfo
+from sequencer.stepseq import seq_multi_track
+from synth.note_cache import NOTE_CACHE
+
+MAX_ERROR = 1e-4
+
+PARAMS = {"attack": 0.01, "decay": 0.1, "sustain": 0.7, "release": 0.2, "volume": 0.8}
+FREQ_MAP = {"C4": 261.63, "E4": 329.63, "G4": 392.0, "A4": 440.0}
+
+
+def cases(seconds):
+    sequence = [
+        {"mode": "binaural", "carrier": 200, "beat": 6, "duration": seconds / 4},
+        {"mode": "isochronic", "carrier": 150, "pulse": 10, "duration": seconds / 4},
+        {"mode": "hemisync", "carrier_l": 200, "carrier_r": 210, "beat_l": 4, "beat_r": 7,
+         "duration": seconds / 4},
+        {"mode": "solfeggio", "freq": 528, "duration": seconds / 4},
+    ]
+    patterns = {"lead": ["C4", 0, "E4", ["C4", "E4", "G4"]] * 8, "bass": ["A4", 0] * 16}
+    t = np.arange(int(seconds * 44100)) / 44100.0
+    return {
+        "note sine": lambda: render_note(440.0, seconds, PARAMS),
+        "note saw": lambda: render_note(440.0, seconds, dict(PARAMS, osc="saw")),
+        "note fm": lambda: render_note(440.0, seconds, dict(PARAMS, osc="fm", mod_freq=3.0, mod_index=2.0)),
+        "note supersaw": lambda: render_note(220.0, seconds / 4, dict(PARAMS, osc="supersaw")),
+        "chord sine": lambda: render_chord([261.63, 329.63, 392.0], seconds, PARAMS),
+        "lfo sine": lambda: lfo(t, rate=5.0),
+        "brainwave sequence": lambda: brainwave_sequence(sequence),
+        "seq multi track": lambda: seq_multi_track(patterns, FREQ_MAP, 120, {"lead": PARAMS, "bass": PARAMS}),
+    }
+
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        NOTE_CACHE.clear()
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+
+    NOTE_CACHE.clear()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, best, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'rendu':<20} {'f64 ms':>9} {'f32 ms':>9} {'x':>6} {'f64 MB':>8} {'f32 MB':>8} {'err max':>10}")
+    failed = []
+    for name, fn in cases(args.seconds).items():
+        with precision(np.float64):
+            ref, t64, m64 = measure(fn, args.repeat)
+        with precision(np.float32):
+            out, t32, m32 = measure(fn, args.repeat)
+        err = float(np.max(np.abs(out.astype(np.float64) - ref), initial=0.0))
+        if err > MAX_ERROR:
+            failed.append(name)
+        print(f"{name:<20} {t64*1e3:9.1f} {t32*1e3:9.1f} {t64/t32:6.2f} "
+              f"{m64/2**20:8.1f} {m32/2**20:8.1f} {err:10.2e}")
+
+    if failed:
+        print(f"écart > {MAX_ERROR:g} : {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,190 @@
-# MIDI export placeholder
+import os
+from io import BytesIO
+
+import mido
+
+from sequencer.stepseq import bpm_to_seconds, step_local_duration
+
+
+###############################################################################
+# Utility
+###############################################################################
+TICKS_PER_BEAT = 480
+NOTE_NAMES = ["C","C#","D","D#","E","F","F#","G","G#","A","A#","B"]
+
+
+def note_to_midi(note):
+    """
+    "C4" → 60, "A4" → 69 (convention MIDI standard).
+    Renvoie None si le nom n'est pas reconnu.
+    """
+    if not isinstance(note, str) or len(note) < 2:
+        return None
+    name, octave = note[:-1], note[-1]
+    if name not in NOTE_NAMES or not octave.isdigit():
+        return None
+    return NOTE_NAMES.index(name) + (int(octave) + 1) * 12
+
+
+def seconds_to_ticks(seconds, bpm, ticks_per_beat=TICKS_PER_BEAT):
+    return int(round(seconds * bpm / 60.0 * ticks_per_beat))
+
+
+###############################################################################
+# Pattern → événements (même timing que seq_one_track)
+###############################################################################
+def pattern_events(pattern, bpm, subdivision=16, gate=0.9, swing=0.0, note_map=None, freq_map=None):
+    """
+    pattern  : [0, "C4", ["C4","E4"], ...]
+    note_map : nom → note MIDI, à dériver de la même table que le freq_map
+               joué (défaut : note_to_midi, C4 = 60)
+    freq_map : si donné, pas et notes absents sont traités comme dans
+               seq_one_track (note seule absente : pas supprimé, le temps
+               n'avance pas)
+    Renvoie [(start_s, duration_s, [notes midi])], silences exclus.
+    """
+    to_midi = note_to_midi if note_map is None else note_map.get
+    step_duration = bpm_to_seconds(bpm, subdivision)
+    events = []
+    start = 0.0
+
+    for i, step in enumerate(pattern):
+        local_duration = step_local_duration(i, step_duration, swing)
+
+        if isinstance(step, str):
+            if freq_map is not None and step not in freq_map:
+                continue
+            notes = [to_midi(step)]
+        elif isinstance(step, (list, tuple)):
+            notes = [to_midi(n) for n in step if freq_map is None or n in freq_map]
+        else:
+            notes = []
+
+        notes = [n for n in notes if n is not None]
+        if notes:
+            events.append((start, local_duration * gate, notes))
+
+        start += local_duration
+
+    return events
+
+
+def score_events(score):
+    """Partition de synth.ai_music_gen.ai_music_score → événements."""
+    return [
+        (ev["start"], ev["duration"], [int(round(ev["midi"]))])
+        for ev in score
+        if ev["midi"] is not None
+    ]
+
+
+###############################################################################
+# Événements → piste MIDI
+###############################################################################
+def events_to_track(events, bpm, name=None, channel=0, velocity=100,
+                    program=None, ticks_per_beat=TICKS_PER_BEAT):
+    """
+    events : [(start_s, duration_s, [notes midi])]
+    Les instants absolus sont arrondis en ticks puis convertis en deltas.
+    """
+    messages = []
+    for start, duration, notes in events:
+        on = seconds_to_ticks(start, bpm, ticks_per_beat)
+        off = max(seconds_to_ticks(start + duration, bpm, ticks_per_beat), on + 1)
+        for note in notes:
+            messages.append((on, 1, mido.Message("note_on", note=note, velocity=velocity, channel=channel)))
+            messages.append((off, 0, mido.Message("note_off", note=note, velocity=0, channel=channel)))
+
+    # note_off avant note_on au même tick (notes répétées)
+    messages.sort(key=lambda m: (m[0], m[1]))
+
+    track = mido.MidiTrack()
+    if name is not None:
+        track.append(mido.MetaMessage("track_name", name=name, time=0))
+    if program is not None:
+        track.append(mido.Message("program_change", program=program, channel=channel, time=0))
+
+    now = 0
+    for tick, _, msg in messages:
+        track.append(msg.copy(time=tick - now))
+        now = tick
+    track.append(mido.MetaMessage("end_of_track", time=0))
+    return track
+
+
+def _midi_file(bpm, ticks_per_beat=TICKS_PER_BEAT):
+    mid = mido.MidiFile(type=1, ticks_per_beat=ticks_per_beat)
+    tempo = mido.MidiTrack()
+    tempo.append(mido.MetaMessage("set_tempo", tempo=mido.bpm2tempo(bpm), time=0))
+    tempo.append(mido.MetaMessage("time_signature", numerator=4, denominator=4, time=0))
+    tempo.append(mido.MetaMessage("end_of_track", time=0))
+    mid.tracks.append(tempo)
+    return mid
+
+
+###############################################################################
+# Multi Track
+###############################################################################
+def patterns_to_midi(
+    patterns,
+    bpm,
+    subdivision=16,
+    gate=0.9,
+    swing=0.0,
+    velocity=100,
+    programs=None,
+    ticks_per_beat=TICKS_PER_BEAT,
+    note_map=None,
+    freq_map=None
+):
+    """
+    Équivalent partition de seq_multi_track : une piste MIDI par piste du
+    séquenceur (canal 0..15, le canal 9 / batterie est évité), sans aucune
+    synthèse audio. note_map / freq_map : voir pattern_events.
+    """
+    programs = programs or {}
+    mid = _midi_file(bpm, ticks_per_beat)
+
+    channels = [c for c in range(16) if c != 9]
+    for i, (tname, pattern) in enumerate(patterns.items()):
+        events = pattern_events(pattern, bpm, subdivision, gate, swing, note_map, freq_map)
+        mid.tracks.append(events_to_track(
+            events, bpm,
+            name=tname,
+            channel=channels[i % len(channels)],
+            velocity=velocity,
+            program=programs.get(tname),
+            ticks_per_beat=ticks_per_beat,
+        ))
+    return mid
+
+
+def score_to_midi(score, bpm, name="ai", velocity=90, ticks_per_beat=TICKS_PER_BEAT):
+    """Partition IA (ai_music_score) → fichier MIDI, bpm = BRAINWAVE_BPM[...]."""
+    mid = _midi_file(bpm, ticks_per_beat)
+    mid.tracks.append(events_to_track(score_events(score), bpm, name=name,
+                                      velocity=velocity, ticks_per_beat=ticks_per_beat))
+    return mid
+
+
+###############################################################################
+# Output
+###############################################################################
+def midi_to_bytes(mid):
+    buf = BytesIO()
+    mid.save(file=buf)
+    return buf.getvalue()
+
+
+def export_patterns_batch(pattern_sets, out_dir, bpm, **kwargs):
+    """
+    pattern_sets : {"nom": patterns, ...} → out_dir/nom.mid pour chacun.
+    kwargs transmis à patterns_to_midi. Renvoie la liste des chemins.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, patterns in pattern_sets.items():
+        path = os.path.join(out_dir, f"{name}.mid")
+        patterns_to_midi(patterns, bpm, **kwargs).save(path)
+        paths.append(path)
+    return paths
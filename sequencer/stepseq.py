@@ -1,5 +1,10 @@
+import os
+import threading
 import numpy as np
-from synth.engine import render_note, render_chord, to_int16
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from synth.engine import to_int16
+from synth.note_cache import cached_render_note, cached_render_chord, note_key
+from synth.precision import get_dtype, with_current_precision
 
 
 ###############################################################################
@@ -10,6 +15,74 @@ def bpm_to_seconds(bpm, subdivision):
     return beat * (4.0 / subdivision)
 
 
+def step_local_duration(i, step_duration, swing):
+    # swing sur les pas pairs
+    if (i % 2 == 1) and swing != 0.0:
+        return step_duration * (1.0 + swing)
+    return step_duration
+
+
+###############################################################################
+# One Step
+###############################################################################
+def render_step(step, local_duration, freq_map, synth_params, sample_rate=44100, gate=0.9):
+    """
+    Rend un pas : silence, note ("C4") ou accord (["C4","E4"]).
+    Renvoie None si la note est absente de freq_map (pas ignoré).
+    """
+    parts = step_parts(step, local_duration, freq_map, synth_params, sample_rate, gate)
+    if parts is None:
+        return None
+    wave, frames = parts
+    if wave is None:
+        return np.zeros(frames, dtype=np.float32)
+
+    # silence si gate < 1.0
+    if frames > len(wave):
+        wave = np.concatenate([wave, np.zeros(frames - len(wave), dtype=np.float32)])
+    return wave
+
+
+def step_parts(step, local_duration, freq_map, synth_params, sample_rate=44100, gate=0.9):
+    """
+    (son, longueur du pas) sans concaténer le silence de gate : le son est
+    le tableau partagé du cache de notes, None pour un silence.
+    Renvoie None si la note est absente de freq_map (pas ignoré).
+    """
+
+    if step == 0 or step is None:
+        return None, int(local_duration * sample_rate)
+
+    # MONO note
+    if isinstance(step, str):
+        freq = freq_map.get(step, None)
+        if freq is None:
+            return None
+        wave = cached_render_note(freq, local_duration * gate, synth_params, sample_rate)
+
+    # ACCORD
+    elif isinstance(step, (list, tuple)):
+        freqs = [freq_map[n] for n in step if n in freq_map]
+        wave = cached_render_chord(freqs, local_duration * gate, synth_params, sample_rate)
+
+    else:
+        return None, int(local_duration * sample_rate)
+
+    silence_len = int(local_duration * (1 - gate) * sample_rate)
+    return wave, len(wave) + max(silence_len, 0)
+
+
+def step_signature(step, freq_map):
+    """Tout ce dont dépend le rendu d'un pas, hors timing et params."""
+    if step == 0 or step is None:
+        return ("rest",)
+    if isinstance(step, str):
+        return ("note", freq_map.get(step, None))
+    if isinstance(step, (list, tuple)):
+        return ("chord", tuple(freq_map[n] for n in step if n in freq_map))
+    return ("rest",)
+
+
 ###############################################################################
 # One Track
 ###############################################################################
@@ -21,50 +94,25 @@ def seq_one_track(
     subdivision=16,
     sample_rate=44100,
     gate=0.9,
-    swing=0.0
+    swing=0.0,
+    progress=None
 ):
     """
     pattern : [0, "C4", ["C4","E4"], ...]
     freq_map : dict note → frequency
+    progress : callback(fraction 0–1) appelé après chaque pas
     """
 
     step_duration = bpm_to_seconds(bpm, subdivision)
     audio = []
 
     for i, step in enumerate(pattern):
-
-        local_duration = step_duration
-
-        # swing sur les pas pairs
-        if (i % 2 == 1) and swing != 0.0:
-            local_duration *= (1.0 + swing)
-
-        if step == 0 or step is None:
-            audio.append(np.zeros(int(local_duration * sample_rate)))
-            continue
-
-        # MONO note
-        if isinstance(step, str):
-            freq = freq_map.get(step, None)
-            if freq is None:
-                continue
-            wave = render_note(freq, local_duration * gate, synth_params, sample_rate)
-
-        # ACCORD
-        elif isinstance(step, (list, tuple)):
-            freqs = [freq_map[n] for n in step if n in freq_map]
-            wave = render_chord(freqs, local_duration * gate, synth_params, sample_rate)
-
-        else:
-            audio.append(np.zeros(int(local_duration * sample_rate)))
-            continue
-
-        # silence si gate < 1.0
-        silence_len = int(local_duration * (1 - gate) * sample_rate)
-        if silence_len > 0:
-            wave = np.concatenate([wave, np.zeros(silence_len)])
-
-        audio.append(wave)
+        local_duration = step_local_duration(i, step_duration, swing)
+        wave = render_step(step, local_duration, freq_map, synth_params, sample_rate, gate)
+        if wave is not None:
+            audio.append(wave)
+        if progress is not None:
+            progress((i + 1) / len(pattern))
 
     out = np.concatenate(audio)
     out = out / (np.max(np.abs(out)) + 1e-9)
@@ -82,31 +130,326 @@ def seq_multi_track(
     subdivision=16,
     sample_rate=44100,
     gate=0.9,
-    swing=0.0
+    swing=0.0,
+    workers=1,
+    executor="thread",
+    progress=None
 ):
+    """
+    workers  : 1 → rendu séquentiel ; N → N pistes en parallèle ;
+               None → une tâche par cœur
+    executor : "thread" (défaut), "process", ou un Executor existant
+               (réutilisé tel quel, non fermé)
+    progress : callback(fraction 0–1) — par pas en séquentiel, par piste
+               terminée en parallèle
+    """
 
-    tracks = []
-
+    jobs = []
     for tname, pattern in patterns.items():
         synth_params = params_per_track.get(tname, params_per_track.get("default"))
+        jobs.append((pattern, freq_map, bpm, synth_params, subdivision, sample_rate, gate, swing))
 
-        wave = seq_one_track(
-            pattern,
-            freq_map,
-            bpm,
-            synth_params,
-            subdivision,
-            sample_rate,
-            gate,
-            swing
+    if workers == 1 and isinstance(executor, str):
+        tracks = (
+            seq_one_track(*job, progress=_track_progress(progress, k, len(jobs)))
+            for k, job in enumerate(jobs)
         )
+        return _mix_tracks(tracks)
+
+    # threads : même précision que l'appelant (un process repart du défaut)
+    in_process = executor == "process" or isinstance(executor, ProcessPoolExecutor)
+    render = seq_one_track if in_process else with_current_precision(seq_one_track)
+    if isinstance(executor, str):
+        pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_cls(max_workers=workers or os.cpu_count()) as pool:
+            return _mix_tracks([pool.submit(render, *job) for job in jobs], progress)
+
+    return _mix_tracks([executor.submit(render, *job) for job in jobs], progress)
+
+
+def _track_progress(progress, k, n):
+    """Progression de la piste k (0–1) ramenée à celle des n pistes."""
+    if progress is None:
+        return None
+    return lambda fraction: progress((k + fraction) / n)
+
+
+def _mix_tracks(tracks, progress=None):
+    """
+    Somme les pistes (tableaux ou futures) dans un buffer alloué une fois,
+    dans l'ordre des pistes pour un résultat déterministe.
+    """
+    mix = None
+    count = len(tracks) if progress is not None else 0
+
+    for k, track in enumerate(tracks):
+        wave = track.result() if isinstance(track, Future) else track
+        if mix is None:
+            mix = np.zeros(len(wave), dtype=get_dtype())
+        mix += wave
+        if progress is not None:
+            progress((k + 1) / count)
+
+    mix /= np.max(np.abs(mix)) + 1e-9
+    return mix.astype(np.float32, copy=False)
+
+
+###############################################################################
+# Incremental Multi Track (rendu persistant, pas modifiés uniquement)
+###############################################################################
+class _TrackState:
+    """Pas rendus d'une piste, mis bout à bout dans un buffer brut."""
+
+    def __init__(self):
+        self.params_key = None
+        self.steps = []       # [(signature, wave | None)]
+        self.offsets = []
+        self.peaks = []
+        self.buffer = np.zeros(0)
+        self.gain = 1.0
+
+    def update(self, pattern, freq_map, synth_params, step_duration, sample_rate, gate, swing):
+        """
+        Re-rend les pas dont la signature a changé.
+        Renvoie (patches, relayout, rendered) avec patches = [(offset, old, new)].
+        """
+        params_key = note_key("track", [], 0.0, synth_params, sample_rate)
+        if params_key != self.params_key:
+            self.params_key = params_key
+            self.steps = []
+
+        relayout = len(pattern) != len(self.steps)
+        changed = []
+        steps = []
+        rendered = 0
+
+        for i, step in enumerate(pattern):
+            sig = step_signature(step, freq_map)
+            if i < len(self.steps) and self.steps[i][0] == sig:
+                steps.append(self.steps[i])
+                continue
+
+            local_duration = step_local_duration(i, step_duration, swing)
+            wave = render_step(step, local_duration, freq_map, synth_params, sample_rate, gate)
+            steps.append((sig, wave))
+            rendered += 1
+
+            if not relayout:
+                old = self.steps[i][1]
+                if old is None or wave is None or len(old) != len(wave):
+                    relayout = True
+                else:
+                    changed.append(i)
+
+        patches = []
+        if relayout:
+            self.steps = steps
+            waves = [w for _, w in steps if w is not None]
+            self.buffer = np.concatenate(waves) if waves else np.zeros(0)
+            self.offsets = np.cumsum([0] + [0 if w is None else len(w) for _, w in steps])[:-1].tolist()
+            self.peaks = [0.0 if w is None or len(w) == 0 else float(np.max(np.abs(w))) for _, w in steps]
+        else:
+            for i in changed:
+                old, new = self.steps[i][1], steps[i][1]
+                off = self.offsets[i]
+                self.buffer[off:off+len(new)] = new
+                self.peaks[i] = float(np.max(np.abs(new))) if len(new) else 0.0
+                patches.append((off, old, new))
+            self.steps = steps
+
+        return patches, relayout, rendered
+
+
+class IncrementalSequencer:
+    """
+    Séquenceur multi-pistes persistant : à garder dans st.session_state.
+
+    Chaque appel à render() compare le pattern, freq_map et les params de
+    chaque piste à l'état précédent et ne re-rend que les pas modifiés ;
+    ils sont re-mixés dans le buffer existant par différence. Un changement
+    de BPM, subdivision, gate, swing ou sample_rate invalide tout.
+
+    Le résultat est identique à seq_multi_track(...).
+    """
+
+    def __init__(self):
+        self._timing = None
+        self._tracks = {}
+        self._mix = None
+        self.rendered_steps = 0
+        # un rendu à la fois (jobs de fond d'une même session)
+        self._lock = threading.Lock()
+
+    def render(
+        self,
+        patterns,
+        freq_map,
+        bpm,
+        params_per_track,
+        subdivision=16,
+        sample_rate=44100,
+        gate=0.9,
+        swing=0.0,
+        progress=None
+    ):
+        """
+        progress : callback(fraction 0–1) appelé entre deux pistes. S'il
+        lève une exception (annulation), le mix est reconstruit au prochain
+        appel : les pistes déjà mises à jour restent valides.
+        """
+        with self._lock:
+            try:
+                return self._render(
+                    patterns, freq_map, bpm, params_per_track,
+                    subdivision, sample_rate, gate, swing, progress,
+                )
+            except BaseException:
+                self._mix = None
+                raise
+
+    def _render(self, patterns, freq_map, bpm, params_per_track,
+                subdivision, sample_rate, gate, swing, progress):
+        timing = (bpm, subdivision, sample_rate, gate, swing)
+        if timing != self._timing:
+            self._timing = timing
+            self._tracks = {}
+            self._mix = None
+
+        remix = self._mix is None
+        for tname in list(self._tracks):
+            if tname not in patterns:
+                del self._tracks[tname]
+                remix = True
+
+        step_duration = bpm_to_seconds(bpm, subdivision)
+        all_patches = []
+        self.rendered_steps = 0
 
-        tracks.append(wave)
+        for k, (tname, pattern) in enumerate(patterns.items()):
+            synth_params = params_per_track.get(tname, params_per_track.get("default"))
 
-    mix = np.sum(tracks, axis=0)
-    mix = mix / (np.max(np.abs(mix)) + 1e-9)
+            state = self._tracks.get(tname)
+            if state is None:
+                state = self._tracks[tname] = _TrackState()
+                remix = True
 
-    return mix.astype(np.float32)
+            patches, relayout, rendered = state.update(
+                pattern, freq_map, synth_params, step_duration, sample_rate, gate, swing
+            )
+            self.rendered_steps += rendered
+
+            # normalisation par piste, comme seq_one_track
+            gain = 1.0 / (max(state.peaks, default=0.0) + 1e-9)
+            if relayout or gain != state.gain:
+                remix = True
+            state.gain = gain
+            all_patches.extend((state.gain, p) for p in patches)
+            if progress is not None:
+                progress((k + 1) / len(patterns))
+
+        if remix:
+            length = max((len(s.buffer) for s in self._tracks.values()), default=0)
+            self._mix = np.zeros(length, dtype=get_dtype())
+            for state in self._tracks.values():
+                self._mix[:len(state.buffer)] += state.buffer * state.gain
+        else:
+            for gain, (off, old, new) in all_patches:
+                self._mix[off:off+len(new)] += (new - old) * gain
+
+        mix = self._mix / (np.max(np.abs(self._mix), initial=0.0) + 1e-9)
+        return mix.astype(np.float32, copy=False)
+
+
+###############################################################################
+# Rendu par blocs (streaming, sans buffer complet)
+###############################################################################
+class SequenceBlocks:
+    """
+    Sortie de seq_multi_track lue par blocs, aux mêmes échantillons près,
+    sans allouer le signal complet :
+
+        seq = SequenceBlocks(patterns, freq_map, bpm, params_per_track)
+        for block in seq.blocks(start=0): ...
+
+    Chaque pas ne garde que le son partagé du cache de notes et sa
+    longueur : le silence de gate et les silences ne sont jamais alloués,
+    la mémoire suit le nombre de notes distinctes, pas la durée. La
+    normalisation finale demande le pic du mix, calculé une fois à la
+    construction par une passe bloc par bloc ; ensuite blocks(start)
+    repart de n'importe quel échantillon sans rien recalculer avant —
+    garder l'objet pour servir plusieurs seeks.
+    """
+
+    def __init__(self, patterns, freq_map, bpm, params_per_track, subdivision=16,
+                 sample_rate=44100, gate=0.9, swing=0.0, block_size=4096):
+        self.block_size = block_size
+        step_duration = bpm_to_seconds(bpm, subdivision)
+        self._tracks = []     # [(pas (son, longueur), offsets, pic)]
+
+        for tname, pattern in patterns.items():
+            synth_params = params_per_track.get(tname, params_per_track.get("default"))
+            steps = []
+            for i, step in enumerate(pattern):
+                local_duration = step_local_duration(i, step_duration, swing)
+                parts = step_parts(step, local_duration, freq_map, synth_params, sample_rate, gate)
+                if parts is not None:
+                    steps.append(parts)
+            if not steps:
+                raise ValueError(f"piste vide : {tname}")
+            offsets = np.cumsum([0] + [frames for _, frames in steps])
+            # les sons partagés ne sont parcourus qu'une fois chacun
+            sounds = {id(w): w for w, _ in steps if w is not None}.values()
+            peak = max((np.max(np.abs(w), initial=0.0) for w in sounds), default=0.0)
+            self._tracks.append((steps, offsets, peak))
+
+        if not self._tracks:
+            raise ValueError("aucune piste")
+        lengths = {int(offsets[-1]) for _, offsets, _ in self._tracks}
+        if len(lengths) > 1:
+            raise ValueError(f"pistes de longueurs différentes : {sorted(lengths)}")
+        self.frames = lengths.pop()
+
+        self._peak = max((np.max(np.abs(block), initial=0.0) for block in self._mixed(0)), default=0.0)
+
+    def blocks(self, start=0):
+        """Blocs float32 normalisés à partir de l'échantillon start."""
+        for mix in self._mixed(start):
+            mix /= self._peak + 1e-9
+            yield mix.astype(np.float32, copy=False)
+
+    def _mixed(self, start):
+        """Blocs du mix avant normalisation, au dtype du pipeline."""
+        track = np.empty(self.block_size, dtype=np.float32)
+        for pos in range(start, self.frames, self.block_size):
+            n = min(self.block_size, self.frames - pos)
+            mix = np.zeros(n, dtype=get_dtype())
+            for steps, offsets, peak in self._tracks:
+                # même arithmétique que seq_one_track, sur la tranche
+                _slice_steps(steps, offsets, pos, track[:n])
+                mix += (track[:n] / (peak + 1e-9)).astype(np.float32)
+            yield mix
+
+
+def _slice_steps(steps, offsets, pos, out):
+    """
+    Échantillons pos..pos+len(out) de la concaténation des pas, écrits
+    dans out, sans la construire (le silence de fin de pas est implicite).
+    """
+    n = len(out)
+    k = int(np.searchsorted(offsets, pos, side="right")) - 1
+    filled = 0
+    while filled < n:
+        wave, frames = steps[k]
+        local = pos + filled - offsets[k]
+        take = min(frames - local, n - filled)
+        seg = out[filled:filled+take]
+        sounding = 0 if wave is None else max(min(len(wave) - local, take), 0)
+        if sounding:
+            seg[:sounding] = wave[local:local+sounding]
+        seg[sounding:] = 0.0
+        filled += take
+        k += 1
+    return out
 
 
 ###############################################################################
@@ -1,5 +1,5 @@
 import numpy as np
-from synth.engine import render_note
+from synth.note_cache import cached_render_note
 import random
 
 SAMPLE_RATE = 44100
@@ -35,13 +35,20 @@ BRAINWAVE_BPM = {
 # AI MUSIC GENERATOR
 ###############################################################################
 
-def ai_music_brainwave(
+def ai_music_score(
     tonic_freq,
     brainwave,
     scale="minor",
-    bars=8,
-    volume=0.7
+    bars=8
 ):
+    """
+    Choix des notes seuls, sans synthèse.
+
+    Renvoie une liste d'événements consécutifs :
+        {"start": s, "duration": s, "midi": float | None, "freq": Hz | None}
+    (midi/freq à None pour un silence). Les instants suivent exactement
+    l'audio rendu par ai_music_brainwave.
+    """
 
     bpm = BRAINWAVE_BPM[brainwave]
     spb = 60.0 / bpm  # seconds per beat
@@ -49,26 +56,12 @@ def ai_music_brainwave(
     # compute fundamental MIDI
     midi_base = 69 + 12 * np.log2(tonic_freq / 440)
 
-    pattern = []
-    wave_segments = []
-
-    params = {
-        "osc": "sine",
-        "attack": 0.01,
-        "decay": 0.2,
-        "sustain": 0.7,
-        "release": 0.2,
-        "env_mode": "exp",
-        "lfo_rate": 0.1,
-        "lfo_depth": 0.1,
-        "lfo_mode": "tremolo",
-        "lfo_wave": "sine",
-        "volume": volume
-    }
-
     # convert scale to MIDI offsets
     scale_offsets = SCALES.get(scale, SCALES["minor"])
 
+    score = []
+    start = 0.0
+
     # create bars
     for bar in range(bars):
         for beat in range(4):
@@ -82,12 +75,55 @@ def ai_music_brainwave(
 
                 duration = spb * random.choice([0.25, 0.5, 1])
 
-                wave = render_note(freq, duration, params)
-                wave_segments.append(wave)
-
             else:
                 # silence
-                wave_segments.append(np.zeros(int(spb * SAMPLE_RATE)))
+                midi, freq, duration = None, None, spb
+
+            score.append({"start": start, "duration": duration, "midi": midi, "freq": freq})
+            start += int(duration * SAMPLE_RATE) / SAMPLE_RATE
+
+    return score
+
+
+def ai_music_brainwave(
+    tonic_freq,
+    brainwave,
+    scale="minor",
+    bars=8,
+    volume=0.7,
+    score=None
+):
+    """
+    score : partition déjà tirée par ai_music_score (sinon tirée ici),
+            pour rendre l'audio correspondant à un export MIDI.
+    """
+
+    if score is None:
+        score = ai_music_score(tonic_freq, brainwave, scale, bars)
+
+    wave_segments = []
+
+    params = {
+        "osc": "sine",
+        "attack": 0.01,
+        "decay": 0.2,
+        "sustain": 0.7,
+        "release": 0.2,
+        "env_mode": "exp",
+        "lfo_rate": 0.1,
+        "lfo_depth": 0.1,
+        "lfo_mode": "tremolo",
+        "lfo_wave": "sine",
+        "volume": volume
+    }
+
+    for event in score:
+        if event["freq"] is not None:
+            wave = cached_render_note(event["freq"], event["duration"], params)
+            wave_segments.append(wave)
+        else:
+            # silence
+            wave_segments.append(np.zeros(int(event["duration"] * SAMPLE_RATE)))
 
     # join segments
     out = np.concatenate(wave_segments)
@@ -1,72 +1,303 @@
+import mmap
+import os
+import tempfile
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from math import lcm
+from multiprocessing import get_context
+from synth.oscillators import PhaseOscillator
 
 SAMPLE_RATE = 44100
+BLOCK_SIZE = 4096
+MAX_PERIOD_SECONDS = 10.0
+
+# Fichiers de rendu parallèle : en RAM (tmpfs) quand c'est possible
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
 
 
 ###############################################################################
-# 1. BINAURAL BEATS
+# 0. VOIX STÉRÉO À PHASE CONTINUE
 ###############################################################################
-def binaural_beats(carrier, beat, duration, volume=0.8, sample_rate=SAMPLE_RATE):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+class BrainwaveVoice:
+    """
+    Oscillateurs partagés par tous les segments d'une séquence.
 
-    left  = np.sin(2*np.pi*carrier * t)
-    right = np.sin(2*np.pi*(carrier + beat) * t)
+    left / right : porteuses des deux canaux
+    pulse        : carré 0/1 des modes isochronique et hybride
+    pan          : LFO 0.2 Hz du mode hemisync
+
+    La phase de chaque oscillateur continue d'un bloc et d'un segment à
+    l'autre, ce qui supprime les clics aux transitions de la séquence.
+    Les blocs sont calculés au dtype du pipeline (synth.precision) puis
+    écrits en float32.
+    """
 
-    stereo = np.vstack([left, right]).T
-    return (stereo * volume).astype(np.float32)
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.left  = PhaseOscillator(0.0, sample_rate)
+        self.right = PhaseOscillator(0.0, sample_rate)
+        self.pulse = PhaseOscillator(0.0, sample_rate, "square")
+        self.pan   = PhaseOscillator(0.2, sample_rate)
+
+    def mono(self, freq, n):
+        """Porteuse identique sur les deux canaux (droite recalée sur gauche)."""
+        self.left.freq = freq
+        wave = self.left.render(n)
+        self.right.freq = freq
+        self.right.phase = self.left.phase
+        return wave
+
+    def gate(self, freq, n):
+        """Pulsation carrée 0/1 à freq Hz."""
+        self.pulse.freq = freq
+        pulse = self.pulse.render(n)
+        pulse += 1
+        pulse *= 0.5
+        return pulse
+
+    def state(self):
+        """(freq, phase) de chaque oscillateur : de quoi reprendre ailleurs."""
+        return tuple((osc.freq, osc.phase) for osc in (self.left, self.right, self.pulse, self.pan))
+
+    @classmethod
+    def from_state(cls, state, sample_rate=SAMPLE_RATE):
+        voice = cls(sample_rate)
+        for osc, (freq, phase) in zip((voice.left, voice.right, voice.pulse, voice.pan), state):
+            osc.freq = freq
+            osc.phase = phase
+        return voice
 
 
 ###############################################################################
-# 2. ISOCHRONIC TONES
+# 0b. RENDU PAR BLOCS (un générateur par mode)
 ###############################################################################
-def isochronic_tones(carrier, pulse_freq, duration, volume=0.8, sample_rate=SAMPLE_RATE):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+def _binaural_block(item, voice, n):
+    voice.left.freq  = item["carrier"]
+    voice.right.freq = item["carrier"] + item["beat"]
+    return voice.left.render(n), voice.right.render(n)
+
+
+def _isochronic_block(item, voice, n):
+    mono = voice.mono(item["carrier"], n)
+    mono *= voice.gate(item["pulse"], n)
+    return mono, mono
+
+
+def _hemisync_block(item, voice, n):
+    voice.left.freq  = item["carrier_l"] + item["beat_l"]
+    voice.right.freq = item["carrier_r"] + item["beat_r"]
+    left  = voice.left.render(n)
+    right = voice.right.render(n)
+
+    # Crossfade léger entre L/R pour effet spatial (LFO lent 0.2 Hz)
+    pan = voice.pan.render(n)
+    pan += 1
+    pan *= 0.5
+
+    # left * (1-pan) + right * pan
+    right -= left
+    right *= pan
+    left += right
+    return left, left
+
+
+def _hybrid_block(item, voice, n):
+    left, right = _binaural_block(item, voice, n)
+    pulse = voice.gate(item["beat"], n)
+    left  *= pulse
+    right *= pulse
+    return left, right
+
+
+def _solfeggio_block(item, voice, n):
+    wave = voice.mono(item["freq"], n)
+    return wave, wave
+
+
+BLOCK_RENDERERS = {
+    "binaural":   _binaural_block,
+    "isochronic": _isochronic_block,
+    "hemisync":   _hemisync_block,
+    "hybrid":     _hybrid_block,
+    "solfeggio":  _solfeggio_block,
+}
+
 
-    wave = np.sin(2*np.pi*carrier * t)
-    pulse = 0.5 * (1 + np.sign(np.sin(2*np.pi*pulse_freq * t)))  # Carré 0/1
+def _block_renderer(item):
+    mode = item["mode"]
+    if mode not in BLOCK_RENDERERS:
+        raise ValueError("Unknown brainwave mode:", mode)
+    return BLOCK_RENDERERS[mode]
 
-    mono = wave * pulse * volume
-    stereo = np.vstack([mono, mono]).T
-    return stereo.astype(np.float32)
+
+def segment_frames(item, sample_rate=SAMPLE_RATE):
+    """Nombre d'échantillons (par canal) d'un segment."""
+    return int(sample_rate * item["duration"])
+
+
+def sequence_frames(sequence, sample_rate=SAMPLE_RATE):
+    """Nombre total d'échantillons d'une séquence, pour préallouer `out`."""
+    return sum(segment_frames(item, sample_rate) for item in sequence)
+
+
+def _output_buffer(out, total):
+    """
+    Valide (ou alloue) le buffer de sortie : (total, 2) float32 entrelacé,
+    C-contigu — un np.memmap convient aussi.
+    """
+    if out is None:
+        return np.empty((total, 2), dtype=np.float32)
+    if out.shape != (total, 2) or out.dtype != np.float32 or not out.flags.c_contiguous:
+        raise ValueError(
+            f"out doit être un tableau ({total}, 2) float32 C-contigu, "
+            f"reçu {out.shape} {out.dtype}"
+        )
+    return out
 
 
 ###############################################################################
-# 3. HEMISYNC (CROSS-BRAIN ENTRAINMENT)
+# 0c. PÉRIODE EXACTE D'UN SEGMENT (rendu d'une période puis pavage)
 ###############################################################################
-def hemisync(carrier_l, carrier_r, beat_l, beat_r, duration, volume=0.8, sample_rate=SAMPLE_RATE):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+# Oscillateurs de la voix utilisés par chaque mode
+MODE_OSCILLATORS = {
+    "binaural":   ("left", "right"),
+    "isochronic": ("left", "right", "pulse"),
+    "hemisync":   ("left", "right", "pan"),
+    "hybrid":     ("left", "right", "pulse"),
+    "solfeggio":  ("left", "right"),
+}
+
 
-    left  = np.sin(2*np.pi*(carrier_l + beat_l) * t)
-    right = np.sin(2*np.pi*(carrier_r + beat_r) * t)
+def common_period(freqs, sample_rate=SAMPLE_RATE, max_frames=None):
+    """
+    Plus petit nombre d'échantillons N tel que f * N / sample_rate soit
+    entier pour chaque fréquence : au bout de N échantillons, tous les
+    oscillateurs retrouvent leur phase de départ.
+
+    Les fréquences sont lues comme des rationnels de dénominateur ≤ 1000
+    (200, 10.5, 0.2…). Renvoie None si l'une d'elles n'en est pas un, ou
+    si la période dépasse max_frames.
+    """
+    period = 1
+    for f in freqs:
+        ratio = Fraction(f).limit_denominator(1000)
+        if abs(float(ratio) - f) > 1e-9 * max(1.0, abs(f)):
+            return None
+        period = lcm(period, (ratio / Fraction(sample_rate)).denominator)
+        if max_frames is not None and period > max_frames:
+            return None
+    return period
+
+
+def segment_period(item, voice, sample_rate=SAMPLE_RATE):
+    """
+    Période exacte (échantillons) d'un segment, ou None s'il n'est pas
+    assez répétitif pour être pavé (période > MAX_PERIOD_SECONDS ou plus
+    de la moitié du segment). Fixe au passage les fréquences de la voix.
+    """
+    # bloc vide : le générateur règle les fréquences sans avancer les phases
+    _block_renderer(item)(item, voice, 0)
+    oscillators = [getattr(voice, name) for name in MODE_OSCILLATORS[item["mode"]]]
+    total = segment_frames(item, sample_rate)
+    max_frames = min(total // 2, int(MAX_PERIOD_SECONDS * sample_rate))
+    return common_period([osc.freq for osc in oscillators], sample_rate, max_frames)
+
+
+def _advance_voice(item, voice, n):
+    """Avance les phases des oscillateurs du segment de n échantillons sans rendu."""
+    for name in MODE_OSCILLATORS[item["mode"]]:
+        osc = getattr(voice, name)
+        osc.phase = (osc.phase + osc.freq / osc.sample_rate * n) % 1.0
+
+
+def _tile(dst, period, offset=0):
+    """Remplit dst en répétant period à partir de l'échantillon offset."""
+    pos = 0
+    offset %= len(period)
+    while pos < len(dst):
+        n = min(len(period) - offset, len(dst) - pos)
+        dst[pos:pos+n] = period[offset:offset+n]
+        pos += n
+        offset = 0
+    return dst
+
+
+def _render_blocks(render, item, voice, volume, stereo):
+    """Remplit stereo (n, 2) bloc par bloc."""
+    for pos in range(0, len(stereo), BLOCK_SIZE):
+        n = min(BLOCK_SIZE, len(stereo) - pos)
+        left, right = render(item, voice, n)
+        np.multiply(left, volume, out=stereo[pos:pos+n, 0], casting="unsafe")
+        np.multiply(right, volume, out=stereo[pos:pos+n, 1], casting="unsafe")
+    return stereo
+
+
+def _render_segment(item, volume, sample_rate, voice=None, out=None):
+    """
+    Rend un segment complet en (n, 2) float32, bloc par bloc, dans out.
+    Si le segment est périodique, seule la première période est calculée ;
+    le reste est recopié par doublement successif.
+    """
+    render = _block_renderer(item)
+    if voice is None:
+        voice = BrainwaveVoice(sample_rate)
+
+    total = segment_frames(item, sample_rate)
+    stereo = _output_buffer(out, total)
 
-    # Crossfade léger entre L/R pour effet spatial
-    pan = (np.sin(2*np.pi*0.2*t) + 1) / 2   # LFO lent 0.2 Hz
-    left_final  = left  * (1-pan) + right * pan
-    right_final = right * pan  + left  * (1-pan)
+    period = segment_period(item, voice, sample_rate)
+    if period is None:
+        return _render_blocks(render, item, voice, volume, stereo)
 
-    stereo = np.vstack([left_final, right_final]).T
-    return (stereo * volume).astype(np.float32)
+    _render_blocks(render, item, voice, volume, stereo[:period])
+    filled = period
+    while filled < total:
+        n = min(filled, total - filled)
+        stereo[filled:filled+n] = stereo[:n]
+        filled += n
+    _advance_voice(item, voice, total - period)
+    return stereo
 
 
 ###############################################################################
-# 4. HYBRID (BINAURAL + ISOCHRONIC)
+# 1. BINAURAL BEATS
 ###############################################################################
-def hybrid_brainwave(carrier, beat, duration, volume=0.8, sample_rate=SAMPLE_RATE):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+def binaural_beats(carrier, beat, duration, volume=0.8, sample_rate=SAMPLE_RATE, out=None):
+    item = {"mode": "binaural", "carrier": carrier, "beat": beat, "duration": duration}
+    return _render_segment(item, volume, sample_rate, out=out)
 
-    # binaural
-    left  = np.sin(2*np.pi*carrier * t)
-    right = np.sin(2*np.pi*(carrier + beat) * t)
 
-    # isochronic overlay
-    pulse = 0.5 * (1 + np.sign(np.sin(2*np.pi*beat * t)))
+###############################################################################
+# 2. ISOCHRONIC TONES
+###############################################################################
+def isochronic_tones(carrier, pulse_freq, duration, volume=0.8, sample_rate=SAMPLE_RATE, out=None):
+    # Porteuse × carré 0/1
+    item = {"mode": "isochronic", "carrier": carrier, "pulse": pulse_freq, "duration": duration}
+    return _render_segment(item, volume, sample_rate, out=out)
 
-    left  = left  * pulse
-    right = right * pulse
 
-    stereo = np.vstack([left, right]).T
+###############################################################################
+# 3. HEMISYNC (CROSS-BRAIN ENTRAINMENT)
+###############################################################################
+def hemisync(carrier_l, carrier_r, beat_l, beat_r, duration, volume=0.8, sample_rate=SAMPLE_RATE, out=None):
+    item = {
+        "mode": "hemisync",
+        "carrier_l": carrier_l,
+        "carrier_r": carrier_r,
+        "beat_l": beat_l,
+        "beat_r": beat_r,
+        "duration": duration,
+    }
+    return _render_segment(item, volume, sample_rate, out=out)
+
 
-    return (stereo * volume).astype(np.float32)
+###############################################################################
+# 4. HYBRID (BINAURAL + ISOCHRONIC)
+###############################################################################
+def hybrid_brainwave(carrier, beat, duration, volume=0.8, sample_rate=SAMPLE_RATE, out=None):
+    # binaural + pulsation isochronique au rythme du battement
+    item = {"mode": "hybrid", "carrier": carrier, "beat": beat, "duration": duration}
+    return _render_segment(item, volume, sample_rate, out=out)
 
 
 ###############################################################################
@@ -82,75 +313,200 @@ SOLFEGGIO = {
     "852 Hz – Retour à la source": 852
 }
 
-def solfeggio_tone(freq, duration, volume=0.8, sample_rate=SAMPLE_RATE):
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    wave = np.sin(2*np.pi*freq * t) * volume
-    stereo = np.vstack([wave, wave]).T
-    return stereo.astype(np.float32)
+def solfeggio_tone(freq, duration, volume=0.8, sample_rate=SAMPLE_RATE, out=None):
+    item = {"mode": "solfeggio", "freq": freq, "duration": duration}
+    return _render_segment(item, volume, sample_rate, out=out)
 
 
 ###############################################################################
 # 6. BRAINWAVE SEQUENCER (Theta → Alpha → Delta → Gamma...)
 ###############################################################################
-def brainwave_sequence(sequence, volume=0.8, sample_rate=SAMPLE_RATE):
+def voice_states(sequence, sample_rate=SAMPLE_RATE):
+    """
+    État de la voix au début de chaque segment, sans rien rendre : les
+    phases sont avancées analytiquement, segment par segment.
+    """
+    voice = BrainwaveVoice(sample_rate)
+    states = []
+    for item in sequence:
+        states.append(voice.state())
+        # bloc vide : fréquences (et recalage mono) du segment
+        _block_renderer(item)(item, voice, 0)
+        _advance_voice(item, voice, segment_frames(item, sample_rate))
+    return states
+
+
+def _render_shared(path, file_offset, total, offset, item, volume, sample_rate, state):
+    """Worker : rend un segment dans sa tranche du fichier de sortie partagé."""
+    stereo = np.memmap(path, dtype=np.float32, mode="r+", offset=file_offset, shape=(total, 2))
+    n = segment_frames(item, sample_rate)
+    voice = BrainwaveVoice.from_state(state, sample_rate)
+    _render_segment(item, volume, sample_rate, voice, out=stereo[offset:offset+n])
+    del stereo
+
+
+def _shared_file(out):
+    """np.memmap inscriptible qui couvre tout son mapping (pas une vue)."""
+    return (
+        isinstance(out, np.memmap) and isinstance(out.base, mmap.mmap)
+        and out.filename is not None and out.mode in ("r+", "w+")
+    )
+
+
+def _render_parallel(sequence, volume, sample_rate, out, workers, progress=None):
+    """
+    Rend les segments en parallèle dans un seul fichier mappé, alloué une
+    fois : le memmap de l'appelant, sinon un fichier temporaire en RAM
+    (/dev/shm) dont le nom est supprimé dès le rendu fini — le tableau
+    renvoyé garde le mapping, libéré avec lui. Offsets et états de voix
+    sont calculés d'avance ; seuls des paramètres scalaires sont picklés.
+    """
+    total = sequence_frames(sequence, sample_rate)
+    if out is not None and not _shared_file(out):
+        # buffer en mémoire privée : rendu partagé puis une copie
+        out[:] = _render_parallel(sequence, volume, sample_rate, None, workers, progress)
+        return out
+
+    temp = None
+    if out is None:
+        fd, temp = tempfile.mkstemp(prefix="cymatics-", suffix=".f32", dir=SHARED_DIR)
+        os.close(fd)
+        out = np.memmap(temp, dtype=np.float32, mode="w+", shape=(total, 2))
+    try:
+        offsets = np.cumsum([0] + [segment_frames(item, sample_rate) for item in sequence])
+        states = voice_states(sequence, sample_rate)
+        # forkserver : appelable depuis les threads des jobs et du démon
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("forkserver")) as pool:
+            jobs = [
+                pool.submit(_render_shared, out.filename, out.offset, total, int(offset),
+                            item, volume, sample_rate, state)
+                for item, offset, state in zip(sequence, offsets, states)
+            ]
+            for k, job in enumerate(jobs):
+                job.result()
+                if progress is not None:
+                    progress((k + 1) / len(jobs))
+    finally:
+        if temp is not None:
+            os.unlink(temp)
+    return out if temp is None else out.view(np.ndarray)
+
+
+def brainwave_sequence(sequence, volume=0.8, sample_rate=SAMPLE_RATE, out=None, workers=1, progress=None):
     """
     sequence = [
         {"mode": "binaural", "carrier": 200, "beat": 6, "duration": 60},
         {"mode": "solfeggio", "freq": 528, "duration": 30},
         {"mode": "isochronic", "carrier": 150, "pulse": 10, "duration": 120},
     ]
+
+    Une seule voix est partagée par tous les segments : la phase des
+    porteuses est continue aux transitions.
+
+    Les segments sont écrits bout à bout dans un seul buffer (n, 2)
+    float32, alloué ici ou fourni par `out` — par exemple sur disque :
+
+        out = np.memmap(path, dtype=np.float32, mode="w+",
+                        shape=(sequence_frames(sequence), 2))
+        brainwave_sequence(sequence, out=out)
+
+    workers > 1 : segments rendus en parallèle par des processus (voir
+    _render_parallel), même signal à l'arrondi float près ; un `out`
+    np.memmap est rempli directement par les processus.
+
+    progress : callback(fraction 0–1) appelé après chaque segment.
     """
 
-    output = []
+    total = sequence_frames(sequence, sample_rate)
+    if workers > 1 and len(sequence) > 1 and total:
+        if out is not None:
+            _output_buffer(out, total)
+        return _render_parallel(sequence, volume, sample_rate, out, workers, progress)
+
+    combined = _output_buffer(out, total)
+
+    voice = BrainwaveVoice(sample_rate)
+    pos = 0
 
     for item in sequence:
-        mode = item["mode"]
-
-        if mode == "binaural":
-            wave = binaural_beats(
-                item["carrier"],
-                item["beat"],
-                item["duration"],
-                volume
-            )
-
-        elif mode == "isochronic":
-            wave = isochronic_tones(
-                item["carrier"],
-                item["pulse"],
-                item["duration"],
-                volume
-            )
-
-        elif mode == "hemisync":
-            wave = hemisync(
-                item["carrier_l"],
-                item["carrier_r"],
-                item["beat_l"],
-                item["beat_r"],
-                item["duration"],
-                volume
-            )
-
-        elif mode == "hybrid":
-            wave = hybrid_brainwave(
-                item["carrier"],
-                item["beat"],
-                item["duration"],
-                volume
-            )
-
-        elif mode == "solfeggio":
-            wave = solfeggio_tone(
-                item["freq"],
-                item["duration"],
-                volume
-            )
+        n = segment_frames(item, sample_rate)
+        _render_segment(item, volume, sample_rate, voice, out=combined[pos:pos+n])
+        pos += n
+        if progress is not None:
+            progress(pos / max(len(combined), 1))
+
+    return combined
 
-        else:
-            raise ValueError("Unknown brainwave mode:", mode)
 
-        output.append(wave)
+###############################################################################
+# 7. STREAMING PAR BLOCS (mémoire constante)
+###############################################################################
+def brainwave_stream(sequence, volume=0.8, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, start=0,
+                     progress=None):
+    """
+    Version générateur de brainwave_sequence.
+
+    Produit des blocs stéréo float32 de forme (block_size, 2) — le dernier
+    peut être plus court. Les blocs chevauchent les frontières de segments,
+    la mémoire reste donc constante quelle que soit la durée de la session
+    et le premier bloc est disponible immédiatement.
+
+    Un segment périodique n'est calculé que sur une période ; ses blocs
+    sont ensuite lus dans ce buffer par indexation modulaire.
 
-    combined = np.vstack([seg for seg in output])
-    return combined.astype(np.float32)
+    start : premier échantillon produit (reprise / seek). Les phases sont
+    avancées analytiquement jusque-là, sans rien rendre avant.
+    progress : callback(fraction 0–1 de la séquence) appelé à chaque bloc.
+
+    for block in brainwave_stream(BRAINWAVE_PRESETS_PRO[:3]):
+        sink.write(block)
+    """
+    voice = BrainwaveVoice(sample_rate)
+    block = np.empty((block_size, 2), dtype=np.float32)
+    fill = 0
+    skip = start
+    done = start
+    frames = sequence_frames(sequence, sample_rate) if progress is not None else 0
+
+    for item in sequence:
+        render = _block_renderer(item)
+        total = segment_frames(item, sample_rate)
+
+        if skip >= total:
+            render(item, voice, 0)
+            _advance_voice(item, voice, total)
+            skip -= total
+            continue
+        pos, skip = skip, 0
+
+        period = segment_period(item, voice, sample_rate)
+        if period is not None:
+            period = _render_blocks(render, item, voice, volume, np.empty((period, 2), dtype=np.float32))
+            _advance_voice(item, voice, total - len(period))
+        else:
+            _advance_voice(item, voice, pos)
+
+        while pos < total:
+            n = min(block_size - fill, total - pos)
+
+            if period is not None:
+                _tile(block[fill:fill+n], period, pos)
+            else:
+                left, right = render(item, voice, n)
+                np.multiply(left, volume, out=block[fill:fill+n, 0], casting="unsafe")
+                np.multiply(right, volume, out=block[fill:fill+n, 1], casting="unsafe")
+
+            fill += n
+            pos += n
+
+            if fill == block_size:
+                yield block.copy()
+                done += fill
+                fill = 0
+                if progress is not None:
+                    progress(done / frames)
+
+    if fill:
+        yield block[:fill].copy()
+        if progress is not None:
+            progress(1.0)
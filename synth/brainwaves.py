@@ -1,16 +1,18 @@
 import numpy as np
+from synth.oscillators import PhaseOscillator
+from synth.precision import get_dtype
 
 def binaural_beat(base_freq, beat_freq, duration, sample_rate=44100, volume=0.8):
     """
     base_freq : fréquence porteuse (ex : 200 Hz)
     beat_freq : différence entre L et R (ex : 4 Hz pour Theta)
     """
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+    n = int(sample_rate * duration)
+    stereo = np.empty((n, 2), dtype=get_dtype())
 
-    left = np.sin(2*np.pi*base_freq * t)
-    right = np.sin(2*np.pi*(base_freq + beat_freq) * t)
+    PhaseOscillator(base_freq, sample_rate).render(n, out=stereo[:, 0])
+    PhaseOscillator(base_freq + beat_freq, sample_rate).render(n, out=stereo[:, 1])
 
-    stereo = np.vstack([left, right]).T
     stereo *= volume
 
     return stereo
@@ -20,12 +22,15 @@ def isochronic_tone(base_freq, pulse_freq, duration, sample_rate=44100, volume=0
     """
     Pulsations On/Off à fréquence fixe → isochronique
     """
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+    n = int(sample_rate * duration)
 
-    carrier = np.sin(2*np.pi*base_freq*t)
-    pulse = 0.5 * (1 + np.sign(np.sin(2*np.pi*pulse_freq*t)))  # carré 0/1
+    result = PhaseOscillator(base_freq, sample_rate).render(n, out=np.empty(n, dtype=get_dtype()))
+    pulse = PhaseOscillator(pulse_freq, sample_rate, "square").render(n)
+    pulse += 1
+    pulse *= 0.5  # carré 0/1
 
-    result = carrier * pulse * volume
+    result *= pulse
+    result *= volume
     return result
 
 
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from synth.precision import get_dtype
+
+try:
+    import fcntl
+except ImportError:     # Windows : pas de verrou inter-processus
+    fcntl = None
+
+###############################################################################
+# CACHE DISQUE ADRESSÉ PAR CONTENU (partagé entre sessions et processus)
+###############################################################################
+DEFAULT_CACHE_DIR = os.environ.get(
+    "CYMATICS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "cymatics")
+)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024   # 512 Mo
+
+
+def request_key(kind, **fields):
+    """
+    Clé d'une requête de rendu ou d'encodage : hash du nom de la fonction
+    et de tous ses paramètres (fréquences déjà accordées au diapason,
+    sample rate…) et de la précision du pipeline. Les floats sont
+    sérialisés exactement par json.
+    """
+    fields.setdefault("dtype", np.dtype(get_dtype()).name)
+    payload = json.dumps({"kind": kind, **fields}, sort_keys=True, default=repr)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class DiskCache:
+    """
+    Rendus PCM (.npy) et payloads encodés (.wav, .flac…) sur disque,
+    partagés par toutes les sessions Streamlit et tous les processus
+    serveur qui pointent sur le même répertoire.
+
+    - écriture atomique (fichier temporaire + os.replace) : un lecteur ne
+      voit jamais un fichier partiel
+    - LRU par mtime : chaque hit touche le fichier, l'éviction supprime les
+      plus anciens dès que max_bytes est dépassé
+    - éviction sous verrou fcntl exclusif (un seul processus à la fois) ;
+      l'entrée qui vient d'être écrite n'est jamais évincée
+    - une entrée plus grosse que max_bytes n'est pas stockée (elle
+      viderait tout le cache), comme dans NoteCache.put
+    - les tableaux renvoyés sont en lecture seule (np.load mmap)
+
+    Deux processus qui ratent la même clé en même temps rendent chacun de
+    leur côté ; le dernier os.replace gagne, le contenu est identique.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def path(self, key, ext):
+        return os.path.join(self.root, key[:2], key + ext)
+
+    # -- accès bruts ---------------------------------------------------------
+    def read_bytes(self, key, ext):
+        path = self.path(key, ext)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        return data
+
+    def write_bytes(self, key, ext, data):
+        """Chemin du fichier écrit, None si data dépasse max_bytes (non stocké)."""
+        if len(data) > self.max_bytes:
+            return None
+        path = self.path(key, ext)
+        self._atomic_write(path, lambda f: f.write(data))
+        self.evict(keep=path)
+        return path
+
+    def read_array(self, key):
+        path = self.path(key, ".npy")
+        try:
+            wave = np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        return wave
+
+    def write_array(self, key, wave):
+        """Chemin du .npy écrit, None si wave dépasse max_bytes (non stocké)."""
+        if wave.nbytes > self.max_bytes:
+            return None
+        path = self.path(key, ".npy")
+        self._atomic_write(path, lambda f: np.save(f, np.ascontiguousarray(wave)))
+        self.evict(keep=path)
+        return path
+
+    # -- get-or-compute ------------------------------------------------------
+    def array(self, key, render_fn):
+        """PCM en cache, ou render_fn() rendu puis stocké."""
+        wave = self.read_array(key)
+        self._count(wave is not None)
+        if wave is None:
+            wave = np.asarray(render_fn())
+            self.write_array(key, wave)
+            wave.setflags(write=False)
+        return wave
+
+    def payload(self, key, ext, encode_fn):
+        """Octets encodés en cache, ou encode_fn() puis stockés."""
+        data = self.read_bytes(key, ext)
+        self._count(data is not None)
+        if data is None:
+            data = encode_fn()
+            self.write_bytes(key, ext, data)
+        return data
+
+    # -- maintenance ---------------------------------------------------------
+    def evict(self, keep=None):
+        """
+        Supprime les fichiers les moins récemment utilisés au-delà de
+        max_bytes, sauf keep (l'entrée qui vient d'être écrite).
+        """
+        with self._locked():
+            entries = list(self._entries())
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def clear(self):
+        with self._locked():
+            for _, _, path in list(self._entries()):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        entries = list(self._entries())
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
+
+    # -- interne -------------------------------------------------------------
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def _atomic_write(self, path, write_fn):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write_fn(f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _entries(self):
+        """(mtime, taille, chemin) de chaque fichier du cache."""
+        if not os.path.isdir(self.root):
+            return
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    info = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield info.st_mtime, info.st_size, entry.path
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# Cache partagé par toutes les sessions de l'app
+DISK_CACHE = DiskCache()
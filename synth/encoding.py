@@ -0,0 +1,68 @@
+from io import BytesIO
+
+import numpy as np
+
+###############################################################################
+# ENCODAGE COMPRESSÉ (soundfile / libsndfile)
+###############################################################################
+# format : (conteneur, sous-type, type MIME, extension)
+FORMATS = {
+    "flac":   ("FLAC", "PCM_16", "audio/flac", ".flac"),
+    "vorbis": ("OGG", "VORBIS", "audio/ogg", ".ogg"),
+    "opus":   ("OGG", "OPUS", "audio/ogg", ".opus"),
+    "wav":    ("WAV", "PCM_16", "audio/wav", ".wav"),
+}
+
+# Format par usage : sans perte pour l'analyse, compressé pour l'écoute
+USE_CASES = {
+    "analysis": "flac",
+    "listen":   "vorbis",
+}
+
+# libsndfile n'encode l'Opus qu'à ces fréquences (44.1 kHz → Vorbis)
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# Écriture par blocs : libsndfile plante sur un seul gros write Ogg
+WRITE_BLOCK = 1 << 15
+
+
+def resolve_format(fmt, sample_rate):
+    """Nom de format effectif : usage ("listen") ou format, Opus replié sur Vorbis."""
+    fmt = USE_CASES.get(fmt, fmt)
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu : {fmt} ({', '.join(FORMATS)})")
+    if fmt == "opus" and sample_rate not in OPUS_RATES:
+        return "vorbis"
+    return fmt
+
+
+def mime_type(fmt, sample_rate=44100):
+    return FORMATS[resolve_format(fmt, sample_rate)][2]
+
+
+def extension(fmt, sample_rate=44100):
+    return FORMATS[resolve_format(fmt, sample_rate)][3]
+
+
+def encode_audio(wave, sample_rate=44100, fmt="listen"):
+    """
+    Encode un signal float (n,) ou (n, 2) dans [-1, 1] et renvoie les
+    octets du fichier. fmt : "listen", "analysis" ou un nom de FORMATS.
+    """
+    channels = 1 if np.ndim(wave) == 1 else wave.shape[1]
+    blocks = (wave[pos:pos+WRITE_BLOCK] for pos in range(0, len(wave), WRITE_BLOCK))
+    return encode_blocks(blocks, channels, sample_rate, fmt)
+
+
+def encode_blocks(blocks, channels, sample_rate=44100, fmt="listen"):
+    """Comme encode_audio, à partir d'un itérable de blocs (ex. brainwave_stream)."""
+    import soundfile as sf
+
+    container, subtype, _, _ = FORMATS[resolve_format(fmt, sample_rate)]
+    buf = BytesIO()
+    with sf.SoundFile(buf, "w", samplerate=sample_rate, channels=channels,
+                      format=container, subtype=subtype) as f:
+        for block in blocks:
+            for pos in range(0, len(block), WRITE_BLOCK):
+                f.write(np.clip(block[pos:pos+WRITE_BLOCK], -1.0, 1.0))
+    return buf.getvalue()
@@ -1,5 +1,9 @@
 
 import numpy as np
+from synth.oscillators import PhaseOscillator, shape_phases, wrap_phases
+from synth.wavetable import WavetableOscillator, wavetable_supersaw
+from synth.envelopes import cached_envelope, write_envelope
+from synth.precision import get_dtype
 
 SAMPLE_RATE=44100
 
@@ -22,34 +26,142 @@ def am(freq, t, mod_freq, depth):
     return (1+depth*np.sin(2*np.pi*mod_freq*t))*np.sin(2*np.pi*freq*t)
 
 def adsr(t, a,d,s,r, dur):
-    env=np.ones_like(t)*s
-    env[t<a]= (t[t<a]/a)
-    env[(t>=a)&(t<a+d)] = 1 - (1-s)*((t[(t>=a)&(t<a+d)]-a)/d)
-    env[t>dur-r] = s*(1-((t[t>dur-r]-(dur-r))/r))
-    env[t>=dur]=0
-    return env
+    # ancienne API (vecteur temps) : délègue à synth.envelopes
+    return write_envelope(np.empty(len(t), dtype=get_dtype()), "linear", a, d, s, r, len(t)/dur)
+
+def supersaw_phase(freq, N, sr=SAMPLE_RATE, n=7, detune=0.01):
+    saw=PhaseOscillator(freq, sr, "saw")
+    sig=np.zeros(N, dtype=get_dtype())
+    for i in range(n):
+        saw.freq=freq+(i-n/2)*detune*freq
+        saw.phase=0.0
+        sig+=saw.render(N)
+    sig/=n
+    return sig
+
+def fm_phase(freq, N, mod_freq, mod_index, sr=SAMPLE_RATE):
+    wave=PhaseOscillator(mod_freq, sr).render(N, out=np.empty(N, dtype=get_dtype()))
+    wave*=mod_index
+    # phase porteuse repliée dans [0, 1) avant de passer au dtype du pipeline
+    ph=wrap_phases(PhaseOscillator(freq, sr).phases(N), np.empty(N, dtype=wave.dtype))
+    ph*=2*np.pi
+    wave+=ph
+    return np.sin(wave, out=wave)
+
+def am_phase(freq, N, mod_freq, depth, sr=SAMPLE_RATE):
+    wave=PhaseOscillator(mod_freq, sr).render(N, out=np.empty(N, dtype=get_dtype()))
+    wave*=depth
+    wave+=1
+    wave*=PhaseOscillator(freq, sr).render(N)
+    return wave
+
+def note_envelope(dur, p, sr=SAMPLE_RATE):
+    """
+    Enveloppe d'une note selon p["env_mode"] ("linear", "exp", "no_release"),
+    partagée en lecture seule via synth.envelopes.cached_envelope, au dtype
+    du pipeline.
+    """
+    return cached_envelope(p.get("env_mode","linear"), p["attack"], p["decay"], p["sustain"], p["release"], sr, dur, get_dtype())
 
 def render_note(freq, dur, p, sr=SAMPLE_RATE):
     N=int(dur*sr)
-    t=np.linspace(0,dur,N,endpoint=False)
+    dtype=get_dtype()
+    osc=p.get("osc","sine")
+    # osc_mode="wavetable" : tables band-limitées (sans repliement, plus rapide)
+    wavetable=p.get("osc_mode","analytic")=="wavetable"
+    Osc=WavetableOscillator if wavetable else PhaseOscillator
+    # Accumulateur de phase : pas de vecteur temps pour l'oscillateur
+    if osc in PhaseOscillator.WAVEFORMS: wave=Osc(freq,sr,osc).render(N, out=np.empty(N, dtype=dtype))
+    elif osc=="supersaw" and wavetable: wave=wavetable_supersaw(freq,N,sr)
+    elif osc=="supersaw": wave=supersaw_phase(freq,N,sr)
+    elif osc=="fm": wave=fm_phase(freq,N,p["mod_freq"],p["mod_index"],sr)
+    elif osc=="am": wave=am_phase(freq,N,p["mod_freq"],p["mod_depth"],sr)
+    else: wave=Osc(freq,sr).render(N, out=np.empty(N, dtype=dtype))
+
+    wave*=note_envelope(dur, p, sr)
+    wave*=p.get("volume",1.0)
+    return wave.astype(np.float32, copy=False)
+
+# Budget de la matrice de phases float64 (voix × échantillons) d'un groupe
+# de voix : les accords courts du séquenceur passent en une seule
+# évaluation, une note longue est rendue par groupes (au pire voix par voix)
+CHORD_BLOCK_BYTES = 4 * 1024 * 1024
+
+def chord_phases(freqs, N, sr=SAMPLE_RATE):
+    """Phases (cycles) en 2-D : voix × échantillons."""
+    return np.multiply.outer(np.asarray(freqs, dtype=np.float64)/sr, np.arange(N))
+
+def voice_groups(freqs, N):
+    """Fréquences par groupes dont la matrice de phases tient dans CHORD_BLOCK_BYTES."""
+    freqs=np.asarray(freqs, dtype=np.float64)
+    size=max(1, CHORD_BLOCK_BYTES//max(N*8, 1))
+    return [freqs[i:i+size] for i in range(0, len(freqs), size)]
+
+def chord_voices(freqs, N, p, sr=SAMPLE_RATE):
+    """
+    Somme des voix d'un accord, avant enveloppe.
+    Mode analytique : une évaluation (voix × échantillons) par groupe de
+    voix (voice_groups), réduite dans le buffer de sortie — un seul groupe
+    pour un accord du séquenceur ; la matrice reste bornée pour une note
+    longue. Mode wavetable : une lecture de table par voix, accumulée dans
+    le même buffer.
+    """
     osc=p.get("osc","sine")
-    if osc=="sine": wave=osc_sine(freq,t)
-    elif osc=="square": wave=osc_square(freq,t)
-    elif osc=="saw": wave=osc_saw(freq,t)
-    elif osc=="triangle": wave=osc_triangle(freq,t)
-    elif osc=="supersaw": wave=supersaw(freq,t)
-    elif osc=="fm": wave=fm(freq,t,p["mod_freq"],p["mod_index"])
-    elif osc=="am": wave=am(freq,t,p["mod_freq"],p["mod_depth"])
-    else: wave=osc_sine(freq,t)
-
-    env = adsr(t, p["attack"], p["decay"], p["sustain"], p["release"], dur)
-    wave = wave*env*p.get("volume",1.0)
-    return wave.astype(np.float32)
+    dtype=get_dtype()
+    mix=np.zeros(N, dtype=dtype)
+
+    if p.get("osc_mode","analytic")=="wavetable" and osc not in ("fm","am"):
+        if osc=="supersaw":
+            for f in freqs: mix+=wavetable_supersaw(f,N,sr)
+            return mix
+        voice=WavetableOscillator(0.0,sr,osc)
+        for f in freqs:
+            voice.freq=f
+            voice.phase=0.0
+            mix+=voice.render(N)
+        return mix
+
+    if osc=="supersaw":
+        n,detune=7,0.01
+        for i in range(n):
+            for group in voice_groups(np.asarray(freqs)*(1+(i-n/2)*detune),N):
+                ph=chord_phases(group,N,sr)
+                mix+=shape_phases(ph,"saw",np.empty(ph.shape, dtype=dtype)).sum(axis=0)
+        mix/=n
+        return mix
+
+    if osc=="fm":
+        mod=PhaseOscillator(p["mod_freq"],sr).render(N)
+        mod*=p["mod_index"]
+
+    for group in voice_groups(freqs,N):
+        ph=chord_phases(group,N,sr)
+        if osc=="fm":
+            ph=wrap_phases(ph,np.empty(ph.shape, dtype=dtype))
+            ph*=2*np.pi
+            ph+=mod
+            np.sin(ph,out=ph)
+        elif osc in ("saw","triangle"):
+            ph=shape_phases(ph,osc,np.empty(ph.shape, dtype=dtype))
+        else:
+            ph=shape_phases(ph,osc if osc=="square" else "sine",ph if ph.dtype==dtype else np.empty(ph.shape, dtype=dtype))
+        mix+=ph.sum(axis=0)
+
+    if osc=="am":
+        mod=PhaseOscillator(p["mod_freq"],sr).render(N)
+        mod*=p["mod_depth"]
+        mod+=1
+        mix*=mod
+    return mix
 
 def render_chord(freqs, dur, p, sr=SAMPLE_RATE):
-    waves=[render_note(f,dur,p,sr) for f in freqs]
-    mix=np.sum(waves,axis=0)
-    mix/=np.max(np.abs(mix))+1e-9
-    return mix.astype(np.float32)
+    N=int(dur*sr)
+    mix=chord_voices(freqs,N,p,sr)
+
+    # enveloppe calculée une seule fois pour toutes les voix
+    mix*=note_envelope(dur, p, sr)
+    mix*=p.get("volume",1.0)
+    mix/=np.max(np.abs(mix), initial=0.0)+1e-9
+    return mix.astype(np.float32, copy=False)
 
 def to_int16(w): return (w*32767).astype(np.int16)
@@ -1,21 +1,20 @@
+import threading
+from collections import OrderedDict
+
 import numpy as np
+from synth.precision import get_dtype
 
 ###############################################################################
-# ADSR – ENVELOPPE STANDARD
+# ÉCRITURE PAR SEGMENTS (buffer préalloué, sans masques)
 ###############################################################################
-def adsr_envelope(attack, decay, sustain, release, sample_rate, duration):
+def write_envelope(env, mode, attack, decay, sustain, release, sample_rate):
     """
-    Génère une enveloppe ADSR linéaire.
+    Écrit une enveloppe ADSR dans env (préalloué, longueur = durée totale)
+    segment par segment, par slicing.
 
-    attack  (s)  : montée 0 → 1
-    decay   (s)  : descente 1 → sustain
-    sustain (%)  : niveau constant (0–1)
-    release (s)  : retour à 0
-    duration (s) : durée totale
-    sample_rate  : fréquence d’échantillonnage
+    mode = "linear", "exp", "no_release"
     """
-    total_samples = int(duration * sample_rate)
-    env = np.zeros(total_samples, dtype=np.float32)
+    total_samples = len(env)
 
     # SAFETY: éviter divisions nulles
     attack = max(attack, 0.00001)
@@ -24,33 +23,93 @@ def adsr_envelope(attack, decay, sustain, release, sample_rate, duration):
 
     a = int(attack * sample_rate)
     d = int(decay * sample_rate)
-    r = int(release * sample_rate)
-    sustain_level = sustain
+    r = int(release * sample_rate) if mode != "no_release" else 0
 
-    # Zones
-    a_end = a
-    d_end = a_end + d
-    s_end = total_samples - r
+    # Zones (bornées à la durée de la note)
+    a_end = min(a, total_samples)
+    d_end = min(a + d, total_samples)
+    s_end = max(total_samples - r, 0)
 
-    # Attack
-    if a > 0:
-        env[:a_end] = np.linspace(0.0, 1.0, a_end, endpoint=False)
+    # Attack : 0 → 1
+    if a_end > 0:
+        np.multiply(np.arange(a_end), 1.0 / max(a, 1), out=env[:a_end], casting="unsafe")
 
-    # Decay
-    if d > 0 and d_end > a_end:
-        env[a_end:d_end] = np.linspace(1.0, sustain_level, d, endpoint=False)
+    # Decay : 1 → sustain
+    if d_end > a_end:
+        seg = env[a_end:d_end]
+        np.multiply(np.arange(d_end - a_end), (sustain - 1.0) / d, out=seg, casting="unsafe")
+        seg += 1.0
 
     # Sustain
     if s_end > d_end:
-        env[d_end:s_end] = sustain_level
+        env[d_end:s_end] = sustain
+
+    # Release : sustain → 0 ; plus longue que la note, la rampe démarre
+    # déjà entamée (niveau atteint au point total - r), comme l'ancien moteur
+    if total_samples > s_end:
+        start = sustain * min(1.0, total_samples / r) if r else sustain
+        env[s_end:] = np.linspace(start, 0.0, total_samples - s_end)
+
+    # Exponential shaping
+    if mode == "exp":
+        np.power(env, 1.5, out=env)
+
+    return env
 
-    # Release
-    if r > 0 and total_samples > s_end:
-        env[s_end:] = np.linspace(sustain_level, 0.0, total_samples - s_end)
 
+# Cache borné en octets : une enveloppe fait toute la durée de la note
+ENVELOPE_CACHE_BYTES = 16 * 1024 * 1024
+_ENVELOPES = OrderedDict()
+_envelope_bytes = 0
+_envelope_lock = threading.Lock()
+
+
+def cached_envelope(mode, attack, decay, sustain, release, sample_rate, duration, dtype=np.float32):
+    """
+    Enveloppe partagée (lecture seule) par clé (mode, a, d, s, r, sr, dur,
+    dtype) : les notes répétées du séquenceur ne recalculent rien.
+    LRU borné à ENVELOPE_CACHE_BYTES.
+    """
+    global _envelope_bytes
+    key = (mode, attack, decay, sustain, release, sample_rate, duration, np.dtype(dtype).str)
+    with _envelope_lock:
+        env = _ENVELOPES.get(key)
+        if env is not None:
+            _ENVELOPES.move_to_end(key)
+            return env
+
+    env = np.empty(int(duration * sample_rate), dtype=dtype)
+    write_envelope(env, mode, attack, decay, sustain, release, sample_rate)
+    env.setflags(write=False)
+
+    with _envelope_lock:
+        if key not in _ENVELOPES and env.nbytes <= ENVELOPE_CACHE_BYTES:
+            _ENVELOPES[key] = env
+            _envelope_bytes += env.nbytes
+            while _envelope_bytes > ENVELOPE_CACHE_BYTES:
+                _, old = _ENVELOPES.popitem(last=False)
+                _envelope_bytes -= old.nbytes
     return env
 
 
+###############################################################################
+# ADSR – ENVELOPPE STANDARD
+###############################################################################
+def adsr_envelope(attack, decay, sustain, release, sample_rate, duration):
+    """
+    Génère une enveloppe ADSR linéaire.
+
+    attack  (s)  : montée 0 → 1
+    decay   (s)  : descente 1 → sustain
+    sustain (%)  : niveau constant (0–1)
+    release (s)  : retour à 0
+    duration (s) : durée totale
+    sample_rate  : fréquence d’échantillonnage
+    """
+    env = np.zeros(int(duration * sample_rate), dtype=get_dtype())
+    return write_envelope(env, "linear", attack, decay, sustain, release, sample_rate)
+
+
 ###############################################################################
 # ADSR EXPONENTIEL (plus musical)
 ###############################################################################
@@ -58,9 +117,8 @@ def adsr_exponential(attack, decay, sustain, release, sample_rate, duration):
     """
     ADSR exponentiel (sons plus naturels).
     """
-    linear_env = adsr_envelope(attack, decay, sustain, release, sample_rate, duration)
-    # Exponential shaping
-    return np.power(linear_env, 1.5)
+    env = np.zeros(int(duration * sample_rate), dtype=get_dtype())
+    return write_envelope(env, "exp", attack, decay, sustain, release, sample_rate)
 
 
 ###############################################################################
@@ -70,29 +128,8 @@ def adsr_no_release(attack, decay, sustain, sample_rate, duration):
     """
     Version ADSR où la note reste à sustain jusqu'à la fin.
     """
-    total_samples = int(duration * sample_rate)
-    env = np.zeros(total_samples, dtype=np.float32)
-
-    attack = max(attack, 0.00001)
-    decay = max(decay, 0.00001)
-
-    a = int(attack * sample_rate)
-    d = int(decay * sample_rate)
-    s_end = total_samples
-
-    a_end = a
-    d_end = a_end + d
-
-    # Attack
-    env[:a_end] = np.linspace(0.0, 1.0, a_end, endpoint=False)
-
-    # Decay
-    env[a_end:d_end] = np.linspace(1.0, sustain, d, endpoint=False)
-
-    # Sustain
-    env[d_end:s_end] = sustain
-
-    return env
+    env = np.zeros(int(duration * sample_rate), dtype=get_dtype())
+    return write_envelope(env, "no_release", attack, decay, sustain, 0.0, sample_rate)
 
 
 ###############################################################################
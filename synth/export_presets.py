@@ -0,0 +1,155 @@
+"""
+Export hors-ligne du catalogue BRAINWAVE_PRESETS_PRO.
+
+    python -m synth.export_presets --list
+    python -m synth.export_presets --all --format flac --out renders/
+    python -m synth.export_presets "Astral Theta" 3 --format wav --workers 4
+
+Chaque preset est rendu dans un processus séparé et écrit bloc par bloc
+(brainwave_stream → soundfile) : aucune session complète n'est gardée en RAM.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from synth.brainwave_engine import brainwave_stream, SAMPLE_RATE, BLOCK_SIZE
+from synth.brainwave_presets import BRAINWAVE_PRESETS_PRO
+
+FORMATS = {
+    "flac": ("FLAC", "PCM_16"),
+    "wav":  ("WAV", "PCM_16"),
+    "ogg":  ("OGG", "VORBIS"),
+}
+
+
+###############################################################################
+# SÉLECTION
+###############################################################################
+def select_presets(selectors, presets=BRAINWAVE_PRESETS_PRO):
+    """
+    selectors : index (0-based) ou nom (insensible à la casse, sous-chaîne).
+    Un nombre hors catalogue est cherché dans les noms ("528" → Solfeggio
+    528 Hz) ; ValueError si rien ne correspond.
+    """
+    chosen = []
+    for sel in selectors:
+        sel = str(sel)
+        if sel.isdigit() and int(sel) < len(presets):
+            matches = [presets[int(sel)]]
+        else:
+            matches = [p for p in presets if sel.lower() in p["name"].lower()]
+        if not matches:
+            raise ValueError(f"Preset introuvable : {sel}")
+        for p in matches:
+            if p not in chosen:
+                chosen.append(p)
+    return chosen
+
+
+def preset_filename(preset, fmt):
+    slug = re.sub(r"[^a-z0-9]+", "_", preset["name"].lower()).strip("_")
+    return f"{slug}.{fmt}"
+
+
+###############################################################################
+# RENDU D'UN PRESET (exécuté dans un worker)
+###############################################################################
+def export_preset(preset, out_dir, fmt="flac", volume=0.8,
+                  sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE):
+    import soundfile as sf
+
+    file_format, subtype = FORMATS[fmt]
+    path = os.path.join(out_dir, preset_filename(preset, fmt))
+
+    start = time.perf_counter()
+    frames = 0
+    with sf.SoundFile(path, "w", samplerate=sample_rate, channels=2,
+                      format=file_format, subtype=subtype) as f:
+        for block in brainwave_stream([preset], volume, sample_rate, block_size):
+            f.write(block)
+            frames += len(block)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "name": preset["name"],
+        "path": path,
+        "audio_seconds": frames / sample_rate,
+        "elapsed": elapsed,
+        "rtf": elapsed / max(frames / sample_rate, 1e-9),
+        "bytes": os.path.getsize(path),
+    }
+
+
+###############################################################################
+# BATCH
+###############################################################################
+def export_batch(presets, out_dir, fmt="flac", workers=None, volume=0.8,
+                 sample_rate=SAMPLE_RATE, report=print):
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(export_preset, p, out_dir, fmt, volume, sample_rate)
+            for p in presets
+        ]
+        for fut in as_completed(futures):
+            r = fut.result()
+            results.append(r)
+            report(
+                f"{r['name']:<28} {r['audio_seconds']:7.0f} s audio  "
+                f"{r['elapsed']:6.2f} s  RTF {r['rtf']:.4f} "
+                f"({1 / max(r['rtf'], 1e-9):.0f}x temps réel)  "
+                f"{r['bytes'] / 1e6:7.1f} Mo"
+            )
+    wall = time.perf_counter() - start
+
+    audio = sum(r["audio_seconds"] for r in results)
+    written = sum(r["bytes"] for r in results)
+    report(
+        f"Total : {len(results)} presets, {audio / 60:.1f} min audio en {wall:.1f} s "
+        f"→ {audio / max(wall, 1e-9):.0f}x temps réel, {written / 1e6 / max(wall, 1e-9):.1f} Mo/s"
+    )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m synth.export_presets",
+        description="Export par lots de BRAINWAVE_PRESETS_PRO en FLAC/WAV/OGG.",
+    )
+    parser.add_argument("presets", nargs="*", help="index ou nom (sous-chaîne) des presets")
+    parser.add_argument("--all", action="store_true", help="exporter tout le catalogue")
+    parser.add_argument("--list", action="store_true", help="lister les presets et quitter")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="flac")
+    parser.add_argument("--out", default="renders", help="dossier de sortie")
+    parser.add_argument("--workers", type=int, default=None, help="processus (défaut : nb de cœurs)")
+    parser.add_argument("--volume", type=float, default=0.8)
+    parser.add_argument("--sample-rate", type=int, default=SAMPLE_RATE)
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for i, p in enumerate(BRAINWAVE_PRESETS_PRO):
+            print(f"{i:2d}  {p['name']:<28} {p['mode']:<11} {p['duration'] / 60:5.1f} min")
+        return 0
+
+    if args.all:
+        presets = list(BRAINWAVE_PRESETS_PRO)
+    elif args.presets:
+        try:
+            presets = select_presets(args.presets)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        parser.error("préciser des presets ou --all")
+
+    export_batch(presets, args.out, args.format, args.workers, args.volume, args.sample_rate)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from synth.precision import with_current_precision
+
+###############################################################################
+# RENDUS EN TÂCHE DE FOND (partagés par toutes les sessions)
+###############################################################################
+DEFAULT_WORKERS = 2
+
+
+class JobCancelled(Exception):
+    """Levée dans le rendu par le callback de progression d'un job annulé."""
+
+
+class RenderJob:
+    """
+    Un rendu soumis au JobManager.
+
+    progress  : avancement 0–1, mis à jour par le rendu lui-même
+    sessions  : sessions qui attendent ce résultat ; le job n'est annulé
+                que lorsque plus aucune ne l'attend
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.progress = 0.0
+        self.sessions = set()
+        self.future = None
+        self._cancel = threading.Event()
+
+    def report(self, fraction):
+        """Callback `progress=` passé au rendu : point d'annulation coopératif."""
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+
+    def cancel(self):
+        self._cancel.set()
+        self.future.cancel()
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """Résultat du rendu ; None si le job a été annulé."""
+        try:
+            return self.future.result(timeout)
+        except (JobCancelled, CancelledError):
+            return None
+
+
+class JobManager:
+    """
+    File de rendus asynchrones sur un pool de threads (numpy relâche le
+    GIL ; un rendu peut lui-même répartir son travail sur des processus).
+
+    - submit(key, fn, ...) : lance fn(..., progress=job.report), ou rejoint
+      le job identique déjà en cours (même clé), quelle que soit la session
+    - release(job, session) : la session n'attend plus ce job ; annulé
+      s'il n'intéresse plus personne
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render")
+        self._jobs = {}
+        # réentrant : add_done_callback rappelle _forget tout de suite si
+        # le rendu est déjà fini
+        self._lock = threading.RLock()
+
+    def submit(self, key, fn, *args, session=None, **kwargs):
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job.cancelled():
+                job = RenderJob(key)
+                self._jobs[key] = job
+                job.future = self._pool.submit(
+                    with_current_precision(fn), *args, progress=job.report, **kwargs
+                )
+                job.future.add_done_callback(lambda _, job=job: self._forget(job))
+            if session is not None:
+                job.sessions.add(session)
+            return job
+
+    def release(self, job, session=None):
+        with self._lock:
+            job.sessions.discard(session)
+            if not job.sessions and not job.done():
+                job.cancel()
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+
+    def running(self):
+        with self._lock:
+            return [job for job in self._jobs.values() if not job.done()]
+
+    def _forget(self, job):
+        with self._lock:
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+
+
+# Pool partagé par toutes les sessions de l'app
+JOBS = JobManager()
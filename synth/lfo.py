@@ -1,20 +1,31 @@
 import numpy as np
+from synth.oscillators import wrap_phases
+from synth.precision import get_dtype
 
 ###############################################################################
 # WAVEFORMS LFO
 ###############################################################################
 
+def lfo_phase(t, rate):
+    """
+    Phase du LFO en cycles dans [0, 1), au dtype du pipeline.
+    Le produit t * rate reste dans la précision de t : seule la phase
+    repliée est convertie, sans perte sur les longues timelines.
+    """
+    ph = np.multiply(t, rate)
+    return wrap_phases(ph, np.empty(ph.shape, dtype=get_dtype()))
+
 def lfo_sine(t, rate):
-    return np.sin(2 * np.pi * rate * t)
+    return np.sin(2 * np.pi * lfo_phase(t, rate))
 
 def lfo_triangle(t, rate):
-    return 2 * np.abs(2 * ((t * rate) % 1) - 1) - 1
+    return 2 * np.abs(2 * lfo_phase(t, rate) - 1) - 1
 
 def lfo_square(t, rate):
-    return np.sign(np.sin(2 * np.pi * rate * t))
+    return np.sign(np.sin(2 * np.pi * lfo_phase(t, rate)))
 
 def lfo_saw(t, rate):
-    return 2 * ((t * rate) % 1) - 1
+    return 2 * lfo_phase(t, rate) - 1
 
 
 LFO_WAVES = {
@@ -0,0 +1,54 @@
+import numpy as np
+
+###############################################################################
+# POINTS DE BOUCLE (lecture native <audio loop>)
+###############################################################################
+def upward_zero_crossings(wave):
+    """Indices i tels que wave[i-1] < 0 <= wave[i]."""
+    return np.nonzero((wave[:-1] < 0) & (wave[1:] >= 0))[0] + 1
+
+
+def loop_region(wave, sample_rate=44100, freq=None, search=0.25, silence=1e-3):
+    """
+    Région bouclable du son, à laisser répéter par le navigateur
+    (attribut loop) au lieu de np.tile. Ce n'est pas une seule période :
+    la région couvre presque tout le son (le plus grand nombre entier de
+    cycles qu'il contient), pour garder son évolution (enveloppe, battements).
+
+    Si le son est déjà silencieux aux deux bouts (sous silence × crête),
+    il est renvoyé tel quel, en entier. Sinon, la région va du premier au
+    dernier passage par zéro montant : la jonction fin → début est continue
+    en valeur et en pente. Si freq est donnée, la fin est choisie parmi les
+    passages des `search` dernières secondes pour que la longueur tombe sur
+    un nombre entier de périodes (phase alignée).
+
+    wave : mono (n,) ou stéréo (n, 2). Renvoie une vue sur wave.
+    """
+    mono = wave if wave.ndim == 1 else wave.mean(axis=1)
+    peak = np.max(np.abs(mono), initial=0.0)
+    if len(mono) < 2 or peak == 0:
+        return wave
+
+    # Note avec release, pattern du séquenceur : déjà silencieux aux deux
+    # bouts, on garde la longueur exacte (tempo).
+    if max(abs(mono[0]), abs(mono[-1])) <= silence * peak:
+        return wave
+
+    crossings = upward_zero_crossings(mono)
+    start = 0 if mono[0] == 0 else (crossings[0] if len(crossings) else 0)
+
+    ends = crossings[crossings > start]
+    if len(ends) == 0:
+        return wave[start:]
+
+    if freq:
+        tail = ends[ends >= len(mono) - int(search * sample_rate)]
+        if len(tail):
+            period = sample_rate / freq
+            cycles = (tail - start) / period
+            error = np.abs(cycles - np.round(cycles))
+            aligned = tail[error <= 0.05]
+            end = aligned[-1] if len(aligned) else tail[np.argmin(error)]
+            return wave[start:end]
+
+    return wave[start:ends[-1]]
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from synth.engine import render_note, render_chord, SAMPLE_RATE
+from synth.precision import get_dtype
+
+###############################################################################
+# CACHE LRU DES NOTES RENDUES
+###############################################################################
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024   # 64 Mo
+
+
+def note_key(kind, freqs, dur, params, sr):
+    """
+    Clé canonique d'un rendu : les fréquences et durées sont encodées
+    exactement (float.hex), les params triés par nom, avec la précision
+    du pipeline (un rendu float32 ne sert pas une demande float64).
+    """
+    payload = json.dumps(
+        {
+            "kind": kind,
+            "freqs": [float(f).hex() for f in freqs],
+            "dur": float(dur).hex(),
+            "sr": int(sr),
+            "dtype": np.dtype(get_dtype()).name,
+            "params": params,
+        },
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class NoteCache:
+    """
+    Mémoïsation de render_note / render_chord, bornée en octets.
+
+    - éviction LRU dès que max_bytes est dépassé
+    - compteurs hits / misses
+    - les tableaux renvoyés sont en lecture seule (partagés entre appelants)
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, render_fn):
+        with self._lock:
+            wave = self._entries.get(key)
+            if wave is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return wave
+            self.misses += 1
+
+        wave = render_fn()
+        wave.setflags(write=False)
+
+        with self._lock:
+            if key not in self._entries and wave.nbytes <= self.max_bytes:
+                self._entries[key] = wave
+                self.nbytes += wave.nbytes
+                while self.nbytes > self.max_bytes:
+                    _, old = self._entries.popitem(last=False)
+                    self.nbytes -= old.nbytes
+        return wave
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Cache partagé par le séquenceur, le piano et le générateur IA
+NOTE_CACHE = NoteCache()
+
+
+def cached_render_note(freq, dur, p, sr=SAMPLE_RATE, cache=None):
+    cache = NOTE_CACHE if cache is None else cache
+    key = note_key("note", [freq], dur, p, sr)
+    return cache.get(key, lambda: render_note(freq, dur, p, sr))
+
+
+def cached_render_chord(freqs, dur, p, sr=SAMPLE_RATE, cache=None):
+    cache = NOTE_CACHE if cache is None else cache
+    # l'ordre des voix ne change pas la somme
+    key = note_key("chord", sorted(freqs), dur, p, sr)
+    return cache.get(key, lambda: render_chord(freqs, dur, p, sr))
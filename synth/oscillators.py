@@ -1,4 +1,5 @@
 import numpy as np
+from synth.precision import get_dtype
 
 ###############################
 #  BASE OSCILLATEURS
@@ -52,3 +53,111 @@ def osc_additive(freq, t, harmonics=5):
     for h in range(1, harmonics + 1):
         wave += (1 / h) * np.sin(2 * np.pi * freq * h * t)
     return wave
+
+###############################
+#  ACCUMULATEUR DE PHASE
+###############################
+class PhaseOscillator:
+    """
+    Oscillateur à accumulateur de phase (sans vecteur temps).
+
+    La phase est tenue en cycles dans [0, 1) et conservée d'un appel à
+    l'autre : rendre 10 blocs de 4096 échantillons donne exactement le même
+    signal qu'un bloc de 40960, sans saut de phase aux frontières. Changer
+    `freq` entre deux appels reste continu en phase.
+
+    Les buffers internes (rampe, phases, sortie) sont réutilisés tant que la
+    taille de bloc ne grandit pas. Sans `out`, render() renvoie le buffer
+    interne : il est écrasé au prochain appel.
+
+    Les phases restent en float64 ; la sortie est au dtype du pipeline
+    (synth.precision, float32 par défaut) sauf `dtype` explicite.
+    """
+
+    WAVEFORMS = ("sine", "square", "saw", "triangle")
+
+    def __init__(self, freq, sample_rate=44100, waveform="sine", phase=0.0, dtype=None):
+        if waveform not in self.WAVEFORMS:
+            waveform = "sine"
+        self.freq = freq
+        self.sample_rate = sample_rate
+        self.waveform = waveform
+        self.phase = phase % 1.0
+        self.dtype = dtype or get_dtype()
+        self._ramp = np.arange(0, dtype=np.float64)
+        self._phases = np.empty(0)
+        self._out = np.empty(0, dtype=self.dtype)
+
+    def _grow(self, n):
+        if len(self._ramp) < n:
+            self._ramp = np.arange(n, dtype=np.float64)
+            self._phases = np.empty(n)
+            self._out = np.empty(n, dtype=self.dtype)
+
+    def phases(self, n):
+        """
+        Avance de n échantillons et renvoie la phase (cycles) de chacun.
+        """
+        self._grow(n)
+        inc = self.freq / self.sample_rate
+        ph = self._phases[:n]
+        np.multiply(self._ramp[:n], inc, out=ph)
+        ph += self.phase
+        self.phase = (self.phase + inc * n) % 1.0
+        return ph
+
+    def render(self, n, out=None):
+        ph = self.phases(n)
+        if out is None:
+            out = self._out[:n]
+        return shape_phases(ph, self.waveform, out)
+
+
+def wrap_phases(ph, out):
+    """
+    Partie fractionnaire de ph (cycles) écrite dans out, ph - floor(ph).
+    Calculée dans la précision de ph : out peut être en float32 sans
+    perdre les décimales d'une phase de plusieurs milliers de cycles.
+    """
+    np.floor(ph, out=out)
+    return np.subtract(ph, out, out=out)
+
+
+def shape_phases(ph, waveform, out):
+    """
+    Forme d'onde à partir de phases en cycles (tableau de n'importe quelle
+    forme, ex. voix × échantillons). Pour sine/square, out peut être ph ;
+    pour saw/triangle, out doit être un autre buffer.
+
+    Si out est moins précis que ph (float32 ← float64), la phase est
+    repliée pendant la conversion (ph sert alors de brouillon) et tout le
+    reste du calcul se fait en float32.
+    """
+    if out.dtype.itemsize < ph.dtype.itemsize:
+        if waveform in ("sine", "square"):
+            wrap_phases(ph, out)
+            out *= 2 * np.pi
+        else:
+            # saw : 2 * (frac(ph + 0.5) - 0.5)
+            ph += 0.5
+            wrap_phases(ph, out)
+            out -= 0.5
+            out *= 2
+    elif waveform in ("sine", "square"):
+        np.multiply(ph, 2 * np.pi, out=out)
+    else:
+        # saw : 2 * (ph - floor(0.5 + ph))
+        np.add(ph, 0.5, out=out)
+        np.floor(out, out=out)
+        np.subtract(ph, out, out=out)
+        out *= 2
+
+    if waveform in ("sine", "square"):
+        np.sin(out, out=out)
+        if waveform == "square":
+            np.sign(out, out=out)
+    elif waveform == "triangle":
+        np.abs(out, out=out)
+        out *= 2
+        out -= 1
+    return out
@@ -0,0 +1,59 @@
+import numpy as np
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+###############################################################################
+# PRÉCISION DU PIPELINE DE RENDU
+###############################################################################
+# float32 : calcul natif (moitié moins de mémoire et de bande passante)
+# float64 : mode de référence, sur demande
+SUPPORTED = (np.float32, np.float64)
+
+# Par contexte : precision() dans un thread ne touche pas les rendus des
+# autres (jobs en tâche de fond, démon)
+_dtype = ContextVar("dtype", default=np.float32)
+
+
+def get_dtype():
+    """dtype de calcul des oscillateurs, enveloppes, LFOs et mixeurs."""
+    return _dtype.get()
+
+
+def _checked(dtype):
+    dtype = np.dtype(dtype).type
+    if dtype not in SUPPORTED:
+        raise ValueError(f"dtype non supporté : {dtype} (float32 ou float64)")
+    return dtype
+
+
+def set_dtype(dtype):
+    """Précision du contexte courant (thread ou tâche)."""
+    _dtype.set(_checked(dtype))
+
+
+@contextmanager
+def precision(dtype):
+    """
+    with precision("float64"):
+        ref = render_note(440, 1.0, params)
+    """
+    token = _dtype.set(_checked(dtype))
+    try:
+        yield
+    finally:
+        _dtype.reset(token)
+
+
+def with_current_precision(fn):
+    """
+    fn liée à la précision de l'appelant, pour l'exécuter dans un autre
+    thread (un thread neuf repart de float32).
+    """
+    dtype = get_dtype()
+
+    @wraps(fn)
+    def run(*args, **kwargs):
+        with precision(dtype):
+            return fn(*args, **kwargs)
+    return run
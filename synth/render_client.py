@@ -0,0 +1,190 @@
+"""
+Client léger du démon de rendu (python -m synth.render_daemon).
+
+N'importe que numpy : les rendus sont faits par le démon, qui renvoie
+pour chaque résultat un descripteur de fichier .npy (SCM_RIGHTS) relu
+ici en mmap — aucune copie du signal ne transite par le socket, et le
+fichier reste lisible même si le cache l'évince entre-temps.
+
+    with RENDER_POOL.connection() as client:     # OSError si le démon ne tourne pas
+        wave = client.render_note(432.0, 1.0, params)
+"""
+import json
+import os
+import socket
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+DEFAULT_SOCKET = os.environ.get("CYMATICS_RENDER_SOCKET", "/tmp/cymatics-render.sock")
+MAX_FDS = 200   # résultats par batch (limite SCM_RIGHTS : 253)
+
+
+class RenderError(RuntimeError):
+    """Erreur renvoyée par le démon pour une requête."""
+
+
+class RenderClient:
+    """
+    Une connexion Unix persistante ; requêtes JSON ligne par ligne.
+    Les tableaux renvoyés sont en lecture seule (mmap).
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET, timeout=None):
+        self.path = path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(path)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def if_running(cls, path=DEFAULT_SOCKET):
+        """Client connecté, ou None si aucun démon n'écoute sur path."""
+        try:
+            return cls(path)
+        except OSError:
+            return None
+
+    @property
+    def closed(self):
+        return self._sock.fileno() == -1
+
+    def close(self):
+        self._sock.close()
+
+    # -- opérations ----------------------------------------------------------
+    def render_note(self, freq, dur, params, sr=44100):
+        return self.call("render_note", freq=freq, dur=dur, params=params, sr=sr)
+
+    def render_chord(self, freqs, dur, params, sr=44100):
+        return self.call("render_chord", freqs=list(freqs), dur=dur, params=params, sr=sr)
+
+    def seq_multi_track(self, patterns, freq_map, bpm, params_per_track, sr=44100):
+        return self.call(
+            "seq_multi_track", patterns=patterns, freq_map=freq_map, bpm=bpm,
+            params=params_per_track, sr=sr,
+        )
+
+    def brainwave_sequence(self, sequence, volume=0.8, sr=44100, out=None):
+        """
+        out : chemin .npy où le démon écrit directement (sessions longues,
+        hors cache) ; sinon le résultat passe par le cache partagé.
+        """
+        args = {"sequence": sequence, "volume": volume, "sr": sr}
+        if out is not None:
+            args["out"] = os.path.abspath(out)
+        return self.call("brainwave_sequence", **args)
+
+    def batch(self, requests):
+        """
+        Plusieurs rendus en un aller-retour, exécutés en parallèle par le
+        démon : requests = [("render_note", {"freq": …}), …].
+        """
+        if len(requests) > MAX_FDS:
+            raise ValueError(f"batch limité à {MAX_FDS} rendus")
+        response, fds = self._request({"batch": [{"op": op, "args": args} for op, args in requests]})
+        failed = [r for r in response["results"] if not r.get("ok")]
+        if failed:
+            for fd in fds:
+                os.close(fd)
+            self._check(failed[0])
+        return [_load_fd(fds[r["fd"]]) for r in response["results"]]
+
+    def stats(self):
+        response, _ = self._request({"op": "stats"})
+        return response["stats"]
+
+    def call(self, op, **args):
+        response, fds = self._request({"op": op, "args": args})
+        return _load_fd(fds[response["fd"]])
+
+    # -- interne -------------------------------------------------------------
+    def _request(self, request):
+        with self._lock:
+            data, fds = b"", []
+            try:
+                self._sock.sendall(json.dumps(request).encode() + b"\n")
+                while not data.endswith(b"\n"):
+                    chunk, new_fds, _, _ = socket.recv_fds(self._sock, 1 << 16, MAX_FDS)
+                    fds += new_fds
+                    if not chunk:
+                        raise ConnectionError("démon de rendu déconnecté")
+                    data += chunk
+            except OSError:
+                # réponse perdue ou tronquée : la connexion n'est plus utilisable
+                for fd in fds:
+                    os.close(fd)
+                self.close()
+                raise
+        response = json.loads(data)
+        if not response.get("ok"):
+            for fd in fds:
+                os.close(fd)
+        return self._check(response), fds
+
+    @staticmethod
+    def _check(response):
+        if not response.get("ok"):
+            raise RenderError(response.get("error", "erreur inconnue"))
+        return response
+
+
+class ClientPool:
+    """
+    Connexions au démon réutilisées entre requêtes : une par requête en
+    cours, si bien que les requêtes simultanées d'un processus (une
+    session Streamlit par thread) arrivent ensemble au démon, qui les
+    rend en parallèle et fusionne les doublons. Une connexion coupée
+    n'est pas remise dans le pool : la suivante se reconnecte.
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET, max_idle=8):
+        self.path = path
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """Client connecté (OSError si aucun démon n'écoute)."""
+        with self._lock:
+            client = self._idle.pop() if self._idle else None
+        if client is None:
+            client = RenderClient(self.path)
+        try:
+            yield client
+        finally:
+            self._release(client)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for client in idle:
+            client.close()
+
+    def _release(self, client):
+        if not client.closed:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(client)
+                    return
+            client.close()
+
+
+# Pool partagé par toutes les sessions du processus
+RENDER_POOL = ClientPool()
+
+
+def _load_fd(fd):
+    """Tableau .npy en lecture seule (mmap) depuis un descripteur reçu."""
+    with os.fdopen(fd, "rb") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        if 0 in shape:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(f, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                         order="F" if fortran else "C")
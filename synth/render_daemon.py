@@ -0,0 +1,223 @@
+"""
+Démon de rendu partagé par les processus Streamlit d'une même machine.
+
+    python -m synth.render_daemon --socket /tmp/cymatics-render.sock --workers 4
+
+Protocole : socket Unix, une requête JSON par ligne.
+
+    {"op": "render_note", "args": {"freq": 432.0, "dur": 1.0, "params": {...}, "sr": 44100}}
+    {"op": "render_chord" | "seq_multi_track" | "brainwave_sequence", "args": {...}}
+    {"batch": [{"op": ..., "args": ...}, ...]}
+    {"op": "stats"}
+
+Réponse : {"ok": true, "fd": i} (ou {"ok": true, "results": [...]} pour
+un batch) accompagnée des descripteurs des fichiers .npy (SCM_RIGHTS) ;
+le client les relit en mmap (synth.render_client).
+
+Un seul processus charge numpy et les moteurs et garde les caches chauds :
+les rendus vont dans DISK_CACHE, avec les mêmes clés que app.py, et les
+requêtes identiques simultanées — d'un même batch ou de clients
+différents — sont fusionnées en un seul rendu (JobManager).
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+
+import numpy as np
+
+from synth.brainwave_engine import brainwave_sequence, sequence_frames, SAMPLE_RATE
+from synth.disk_cache import DISK_CACHE, request_key
+from synth.engine import render_note, render_chord
+from synth.jobs import JobManager
+from synth.render_client import DEFAULT_SOCKET, MAX_FDS
+from sequencer.stepseq import seq_multi_track
+
+DEFAULT_WORKERS = os.cpu_count() or 2
+
+
+###############################################################################
+# OPÉRATIONS : args → (clé de cache, rendu)
+###############################################################################
+def _render_note(args):
+    freq, dur, params = args["freq"], args["dur"], args["params"]
+    sr = args.get("sr", SAMPLE_RATE)
+    key = request_key("render_note", freq=freq, dur=dur, params=params, sr=sr)
+    return key, lambda: render_note(freq, dur, params, sr)
+
+
+def _render_chord(args):
+    freqs, dur, params = args["freqs"], args["dur"], args["params"]
+    sr = args.get("sr", SAMPLE_RATE)
+    # l'ordre des voix ne change pas la somme
+    key = request_key("render_chord", freqs=sorted(freqs), dur=dur, params=params, sr=sr)
+    return key, lambda: render_chord(freqs, dur, params, sr)
+
+
+def _seq_multi_track(args):
+    patterns, freq_map, bpm, params = args["patterns"], args["freq_map"], args["bpm"], args["params"]
+    sr = args.get("sr", SAMPLE_RATE)
+    key = request_key(
+        "seq_multi_track", patterns=patterns, freq_map=freq_map, bpm=bpm,
+        params=params, sr=sr,
+    )
+    return key, lambda: seq_multi_track(patterns, freq_map, bpm, params, sample_rate=sr)
+
+
+def _brainwave_sequence(args):
+    sequence, volume = args["sequence"], args.get("volume", 0.8)
+    sr = args.get("sr", SAMPLE_RATE)
+    key = request_key("brainwave_sequence", sequence=sequence, volume=volume, sr=sr)
+    return key, lambda: brainwave_sequence(sequence, volume, sr)
+
+
+OPERATIONS = {
+    "render_note":        _render_note,
+    "render_chord":       _render_chord,
+    "seq_multi_track":    _seq_multi_track,
+    "brainwave_sequence": _brainwave_sequence,
+}
+
+
+###############################################################################
+# DÉMON
+###############################################################################
+class RenderDaemon:
+    """Exécute les requêtes : fusion des doublons, rendu en pool, cache partagé."""
+
+    def __init__(self, cache=DISK_CACHE, workers=DEFAULT_WORKERS):
+        self.cache = cache
+        self.jobs = JobManager(workers)
+        self.requests = 0
+
+    def handle(self, request):
+        """Requête décodée → (réponse, descripteurs à envoyer)."""
+        if request.get("op") == "stats":
+            stats = dict(self.cache.stats(), running=len(self.jobs.running()), requests=self.requests)
+            return {"ok": True, "stats": stats}, []
+
+        if "batch" in request:
+            batch = request["batch"][:MAX_FDS]
+            jobs = [self._submit_safe(r) for r in batch]
+            results, fds = [], []
+            for job in jobs:
+                result = self._collect(job)
+                if result.pop("fd", None) is not None:
+                    result["fd"] = len(fds)
+                    fds.append(result.pop("_fd"))
+                results.append(result)
+            return {"ok": True, "results": results}, fds
+
+        result = self._collect(self._submit_safe(request))
+        if not result["ok"]:
+            return result, []
+        return {"ok": True, "fd": 0}, [result["_fd"]]
+
+    # -- interne -------------------------------------------------------------
+    def _submit_safe(self, request):
+        self.requests += 1
+        try:
+            return self._submit(request)
+        except (KeyError, TypeError, ValueError) as e:
+            return e
+
+    def _submit(self, request):
+        op = request.get("op")
+        if op not in OPERATIONS:
+            raise ValueError(f"opération inconnue : {op}")
+        args = request.get("args", {})
+
+        if op == "brainwave_sequence" and "out" in args:
+            key = request_key("brainwave_out", **args)
+            return self.jobs.submit(key, lambda progress: self._render_out(args))
+
+        key, render = OPERATIONS[op](args)
+        return self.jobs.submit(key, lambda progress: (key, self.cache.array(key, render)))
+
+    def _render_out(self, args):
+        """Session écrite directement dans le .npy demandé (hors cache)."""
+        sr = args.get("sr", SAMPLE_RATE)
+        frames = sequence_frames(args["sequence"], sr)
+        out = np.lib.format.open_memmap(args["out"], mode="w+", dtype=np.float32, shape=(frames, 2))
+        brainwave_sequence(args["sequence"], args.get("volume", 0.8), sr, out=out)
+        out.flush()
+        return None, args["out"]
+
+    def _collect(self, job):
+        """Attend le job et ouvre un descripteur propre à ce demandeur."""
+        if isinstance(job, Exception):
+            return {"ok": False, "error": f"requête invalide : {job!r}"}
+        try:
+            key, result = job.result()
+        except Exception as e:
+            return {"ok": False, "error": repr(e)}
+        return {"ok": True, "fd": True, "_fd": self._open(key, result)}
+
+    def _open(self, key, result):
+        if isinstance(result, str):
+            return os.open(result, os.O_RDONLY)
+        try:
+            return os.open(self.cache.path(key, ".npy"), os.O_RDONLY)
+        except FileNotFoundError:
+            # non stocké (plus gros que le cache) ou déjà évincé : fichier anonyme
+            with tempfile.TemporaryFile() as f:
+                np.save(f, np.asarray(result))
+                f.flush()
+                return os.dup(f.fileno())
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response, fds = {"ok": False, "error": f"JSON invalide : {e}"}, []
+            else:
+                response, fds = self.server.render_daemon.handle(request)
+
+            payload = json.dumps(response).encode() + b"\n"
+            try:
+                sent = socket.send_fds(self.request, [payload], fds) if fds else 0
+                self.request.sendall(payload[sent:])
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            finally:
+                for fd in fds:
+                    os.close(fd)
+
+
+def serve(path=DEFAULT_SOCKET, workers=DEFAULT_WORKERS):
+    if os.path.exists(path):
+        os.remove(path)
+    server = socketserver.ThreadingUnixStreamServer(path, _Handler)
+    server.daemon_threads = True
+    server.render_daemon = RenderDaemon(workers=workers)
+    print(f"Démon de rendu sur {path} ({workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m synth.render_daemon",
+        description="Démon de rendu partagé (socket Unix, cache chaud, batching).",
+    )
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+    serve(args.socket, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""
+Serveur HTTP local de streaming progressif, à lancer à côté de l'app.
+
+    python -m synth.stream_server --port 8765
+
+    CYMATICS_STREAM_HOST / CYMATICS_STREAM_PORT : adresse d'écoute
+    CYMATICS_STREAM_URL : URL publique donnée au navigateur, si elle diffère
+
+    GET /brainwave?preset=<index|nom>[&volume=0.8]
+    GET /brainwave?sequence=<json>[&volume=0.8]
+    GET /sequence?spec=<json {"patterns", "freq_map", "bpm", "params"}>
+
+Réponse en WAV PCM 16 bits : la longueur totale est connue d'avance
+(en-tête + Content-Length), puis les blocs sont rendus et envoyés au fil
+de l'eau — le <audio> du navigateur démarre dès les premiers blocs.
+Les requêtes Range sont converties en échantillon de départ : un seek
+reprend le rendu à cet endroit sans calculer ce qui précède.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import numpy as np
+
+from synth.brainwave_engine import (
+    brainwave_stream, segment_frames, sequence_frames, voice_states, SAMPLE_RATE, BLOCK_SIZE,
+)
+from synth.disk_cache import DISK_CACHE, request_key
+from synth.export_presets import select_presets
+
+# Adresse d'écoute, et URL publique vue par le navigateur (reverse proxy,
+# autre machine…) : par défaut la même, ce qui suppose un navigateur local
+DEFAULT_HOST = os.environ.get("CYMATICS_STREAM_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("CYMATICS_STREAM_PORT", 8765))
+_LOCAL_HOST = "127.0.0.1" if DEFAULT_HOST in ("", "0.0.0.0") else DEFAULT_HOST
+PUBLIC_URL = os.environ.get("CYMATICS_STREAM_URL", f"http://{_LOCAL_HOST}:{DEFAULT_PORT}").rstrip("/")
+HEADER_BYTES = 44
+
+
+###############################################################################
+# WAV PCM 16 BITS PROGRESSIF
+###############################################################################
+def wav_header(frames, channels, sample_rate):
+    """En-tête RIFF/WAVE canonique (44 octets) pour frames échantillons."""
+    data_bytes = frames * channels * 2
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate,
+        sample_rate * channels * 2, channels * 2, 16,
+        b"data", data_bytes,
+    )
+
+
+def pcm16(block):
+    return (np.clip(block, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+class AudioSource:
+    """
+    Signal de longueur connue, lisible par blocs à partir de n'importe
+    quel échantillon : blocks(start) est un générateur de tableaux float.
+    """
+
+    def __init__(self, frames, channels, sample_rate, blocks):
+        self.frames = frames
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.blocks = blocks
+
+    @property
+    def nbytes(self):
+        return HEADER_BYTES + self.frames * self.channels * 2
+
+
+def brainwave_source(sequence, volume=0.8, sample_rate=SAMPLE_RATE):
+    """
+    Séquence brainwave rendue à la demande (brainwave_stream).
+    Chaque segment est vérifié d'avance (mode, paramètres, durée) :
+    ValueError avant l'envoi des en-têtes plutôt qu'un flux coupé.
+    """
+    if volume < 0:
+        raise ValueError(f"volume négatif : {volume}")
+    try:
+        voice_states(sequence, sample_rate)
+        if any(segment_frames(item, sample_rate) <= 0 for item in sequence):
+            raise ValueError("durée de segment nulle ou négative")
+        frames = sequence_frames(sequence, sample_rate)
+    except (KeyError, TypeError, IndexError, AttributeError) as e:
+        raise ValueError(f"séquence invalide : {e!r}") from e
+    if frames <= 0:
+        raise ValueError("séquence vide")
+    return AudioSource(
+        frames, 2, sample_rate,
+        lambda start: brainwave_stream(sequence, volume, sample_rate, BLOCK_SIZE, start=start),
+    )
+
+
+def array_source(wave, sample_rate=SAMPLE_RATE):
+    """Signal déjà rendu (séquenceur), découpé en blocs."""
+    def blocks(start):
+        for pos in range(start, len(wave), BLOCK_SIZE):
+            yield wave[pos:pos+BLOCK_SIZE]
+    return AudioSource(len(wave), 1 if wave.ndim == 1 else wave.shape[1], sample_rate, blocks)
+
+
+# Sources du séquenceur déjà construites (pic connu), par clé de spec :
+# chaque seek du navigateur est une nouvelle requête Range sur la même URL
+SEQUENCE_SOURCES = 8
+_SEQUENCES = OrderedDict()
+_sequences_lock = threading.Lock()
+
+
+def sequence_source(spec, sample_rate=SAMPLE_RATE):
+    """
+    Sortie du séquenceur : servie depuis le cache disque partagé avec
+    l'app (même clé) si elle y est déjà, sinon rendue bloc par bloc
+    (SequenceBlocks) sans attendre le signal complet. Les SequenceBlocks
+    sont gardés (LRU de SEQUENCE_SOURCES) : un seek ne refait ni les pas
+    ni la passe de pic.
+    """
+    from sequencer.stepseq import SequenceBlocks
+
+    try:
+        patterns, freq_map, bpm, params = spec["patterns"], spec["freq_map"], spec["bpm"], spec["params"]
+        key = request_key(
+            "seq_multi_track", patterns=patterns, freq_map=freq_map, bpm=bpm,
+            params=params, sr=sample_rate,
+        )
+        wave = DISK_CACHE.read_array(key)
+        if wave is not None:
+            return array_source(wave, sample_rate)
+        with _sequences_lock:
+            seq = _SEQUENCES.get(key)
+            if seq is not None:
+                _SEQUENCES.move_to_end(key)
+        if seq is None:
+            seq = SequenceBlocks(patterns, freq_map, bpm, params, sample_rate=sample_rate, block_size=BLOCK_SIZE)
+            with _sequences_lock:
+                _SEQUENCES[key] = seq
+                while len(_SEQUENCES) > SEQUENCE_SOURCES:
+                    _SEQUENCES.popitem(last=False)
+    except (KeyError, TypeError, IndexError, AttributeError) as e:
+        raise ValueError(f"spec invalide : {e!r}") from e
+    return AudioSource(seq.frames, 1, sample_rate, seq.blocks)
+
+
+def stream_bytes(source, first, last):
+    """Octets first..last (inclus) du fichier WAV, rendus bloc par bloc."""
+    header = wav_header(source.frames, source.channels, source.sample_rate)
+    if first < HEADER_BYTES:
+        yield header[first:last + 1]
+
+    frame_bytes = source.channels * 2
+    audio_first = max(first - HEADER_BYTES, 0)
+    remaining = last - HEADER_BYTES - audio_first + 1
+    if remaining <= 0:
+        return
+
+    start = audio_first // frame_bytes
+    cut = audio_first - start * frame_bytes
+    for block in source.blocks(start):
+        data = pcm16(block)[cut:cut + remaining]
+        cut = 0
+        yield data
+        remaining -= len(data)
+        if remaining <= 0:
+            return
+
+
+def parse_range(header, size):
+    """
+    "bytes=a-b" / "bytes=a-" / "bytes=-n" → (first, last) inclus,
+    None si absent, ValueError si non satisfiable.
+    """
+    if not header:
+        return None
+    m = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header)
+    if not m or m.group(1) == m.group(2) == "":
+        raise ValueError(header)
+    if m.group(1) == "":
+        first, last = max(size - int(m.group(2)), 0), size - 1
+    else:
+        first = int(m.group(1))
+        last = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+    if first > last or first >= size:
+        raise ValueError(header)
+    return first, last
+
+
+###############################################################################
+# SERVEUR
+###############################################################################
+def resolve_source(url):
+    """
+    AudioSource d'une URL /brainwave ou /sequence, None si le chemin est
+    inconnu, ValueError si les paramètres sont absents ou invalides.
+    """
+    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+    volume = float(query.get("volume", 0.8))
+
+    if url.path == "/brainwave":
+        if "sequence" in query:
+            sequence = json.loads(query["sequence"])
+        elif "preset" in query:
+            sequence = select_presets([query["preset"]])[:1]
+        else:
+            raise ValueError("preset ou sequence requis")
+        return brainwave_source(sequence, volume)
+    if url.path == "/sequence":
+        if "spec" not in query:
+            raise ValueError("spec requis")
+        return sequence_source(json.loads(query["spec"]))
+    return None
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+
+    def do_HEAD(self):
+        self._serve(body=False)
+
+    def do_GET(self):
+        self._serve(body=True)
+
+    def _serve(self, body):
+        try:
+            source = resolve_source(urlparse(self.path))
+        except (KeyError, IndexError, ValueError, UnicodeError, json.JSONDecodeError) as e:
+            # raison fixe : le texte de la requête ne va que dans le corps
+            # HTML (échappé par send_error), jamais dans la ligne de statut
+            self.send_error(400, "Bad Request", explain=str(e))
+            return
+        if source is None:
+            self.send_error(404)
+            return
+
+        size = source.nbytes
+        try:
+            byte_range = parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.end_headers()
+            return
+
+        first, last = byte_range or (0, size - 1)
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", "audio/wav")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(last - first + 1))
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {first}-{last}/{size}")
+        self.end_headers()
+        if not body:
+            return
+
+        try:
+            for chunk in stream_bytes(source, first, last):
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            # le navigateur coupe la requête en cours à chaque seek
+            pass
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def stream_url(path, base=PUBLIC_URL, **query):
+    """
+    URL à passer à st.audio / <audio src> :
+        stream_url("/brainwave", preset="Astral Theta")
+    base : URL publique du serveur (CYMATICS_STREAM_URL).
+    Les valeurs non textuelles sont encodées en JSON.
+    """
+    query = {k: v if isinstance(v, str) else json.dumps(v) for k, v in query.items()}
+    return f"{base}{path}?{urlencode(query)}"
+
+
+def server_running(host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=0.2):
+    """Le serveur écoute-t-il (vu du côté de l'app) ?"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = ThreadingHTTPServer((host, port), StreamHandler)
+    server.daemon_threads = True
+    print(f"Streaming sur http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m synth.stream_server",
+        description="Streaming WAV progressif (brainwaves, séquenceur) avec requêtes Range.",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    serve(args.host, args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import numpy as np
+from functools import lru_cache
+from synth.oscillators import PhaseOscillator
+
+###############################################################################
+# TABLES D'ONDE BAND-LIMITÉES (MIP-MAPS PAR OCTAVE)
+###############################################################################
+TABLE_SIZE = 4096                 # puissance de 2 (masquage d'index)
+MAX_HARMONICS = TABLE_SIZE // 4   # niveau 0 : 1024 harmoniques
+N_LEVELS = 11                     # 1024, 512, ..., 1 harmonique(s)
+
+
+def _harmonic_coeffs(waveform, n_harm):
+    """
+    Séries de Fourier des formes analytiques de synth.engine,
+    même convention de phase (phase 0 = sin(0)).
+
+    Renvoie (k, sin_coeffs, cos_coeffs) pour k = 1..n_harm.
+    """
+    k = np.arange(1, n_harm + 1)
+    b = np.zeros(n_harm)
+    a = np.zeros(n_harm)
+    odd = (k % 2) == 1
+
+    if waveform == "saw":
+        b[:] = (2 / np.pi) * ((-1.0) ** (k + 1)) / k
+    elif waveform == "square":
+        b[odd] = (4 / np.pi) / k[odd]
+    elif waveform == "triangle":
+        a[odd] = -(8 / np.pi**2) / k[odd]**2
+    else:
+        b[0] = 1.0
+    return k, b, a
+
+
+def _build_table(waveform, n_harm):
+    k, b, a = _harmonic_coeffs(waveform, n_harm)
+    spectrum = np.zeros(TABLE_SIZE // 2 + 1, dtype=np.complex128)
+    spectrum[k] = (a - 1j * b) * (TABLE_SIZE / 2)
+    return np.fft.irfft(spectrum, TABLE_SIZE)
+
+
+@lru_cache(maxsize=None)
+def wavetables(waveform):
+    """
+    Mip-map d'une forme d'onde, construit une seule fois.
+
+    Renvoie (tables, deltas), deux tableaux float32 (N_LEVELS, TABLE_SIZE) :
+    le niveau k contient MAX_HARMONICS >> k harmoniques, deltas[k][i] vaut
+    tables[k][i+1] - tables[k][i] (avec bouclage) pour l'interpolation.
+    """
+    if waveform == "sine":
+        tables = np.tile(_build_table("sine", 1), (N_LEVELS, 1))
+    else:
+        tables = np.vstack([
+            _build_table(waveform, max(MAX_HARMONICS >> lvl, 1))
+            for lvl in range(N_LEVELS)
+        ])
+    deltas = np.roll(tables, -1, axis=1) - tables
+
+    tables = tables.astype(np.float32)
+    deltas = deltas.astype(np.float32)
+    tables.setflags(write=False)
+    deltas.setflags(write=False)
+    return tables, deltas
+
+
+def mip_level(freq, sample_rate):
+    """
+    Plus petit niveau dont toutes les harmoniques restent sous Nyquist.
+    """
+    freq = abs(freq)
+    if freq <= 0:
+        return 0
+    max_harm = (sample_rate / 2) / freq
+    if max_harm >= MAX_HARMONICS:
+        return 0
+    lvl = int(np.ceil(np.log2(MAX_HARMONICS / max(max_harm, 1.0))))
+    return min(lvl, N_LEVELS - 1)
+
+
+###############################################################################
+# OSCILLATEUR À TABLE D'ONDE
+###############################################################################
+PHASE_BITS = 32
+INDEX_SHIFT = PHASE_BITS - int(np.log2(TABLE_SIZE))
+FRAC_MASK = (1 << INDEX_SHIFT) - 1
+FRAC_SCALE = np.float32(1.0 / (1 << INDEX_SHIFT))
+
+_RAMP = np.arange(0, dtype=np.uint32)
+
+
+def _ramp(n):
+    """Rampe 0..n-1 (uint32) partagée par tous les oscillateurs."""
+    global _RAMP
+    if len(_RAMP) < n:
+        _RAMP = np.arange(max(n, 2 * len(_RAMP)), dtype=np.uint32)
+    return _RAMP[:n]
+
+
+class WavetableOscillator(PhaseOscillator):
+    """
+    PhaseOscillator lisant une table band-limitée avec interpolation
+    linéaire : pas de sin/floor/sign par échantillon, et les formes riches
+    (saw, square) ne replient plus dans l'aigu.
+
+    La phase du bloc est calculée en virgule fixe 32 bits : le débordement
+    entier fait le modulo, les bits de poids fort donnent l'index de table
+    et les bits de poids faible la fraction d'interpolation.
+    Sortie en float32 quel que soit synth.precision (tables en float32).
+    """
+
+    def __init__(self, freq, sample_rate=44100, waveform="sine", phase=0.0):
+        super().__init__(freq, sample_rate, waveform, phase, dtype=np.float32)
+        self._acc = None
+        self._grow(0)
+
+    def _grow(self, n):
+        if self._acc is None or len(self._acc) < n:
+            self._acc = np.empty(n, dtype=np.uint32)
+            self._index = np.empty(n, dtype=np.uint32)
+            self._frac = np.empty(n, dtype=np.float32)
+            self._out = np.empty(n, dtype=np.float32)
+            self._tmp = np.empty(n, dtype=np.float32)
+
+    def render(self, n, out=None):
+        self._grow(n)
+        one = 1 << PHASE_BITS
+        start = int(self.phase * one) % one
+        inc = int(round(self.freq / self.sample_rate * one)) % one
+        self.phase = ((start + inc * n) % one) / one
+
+        acc = self._acc[:n]
+        np.multiply(_ramp(n), np.uint32(inc), out=acc)
+        acc += np.uint32(start)
+
+        idx = self._index[:n]
+        frac = self._frac[:n]
+        np.right_shift(acc, INDEX_SHIFT, out=idx)
+        np.bitwise_and(acc, FRAC_MASK, out=acc)
+        np.multiply(acc, FRAC_SCALE, out=frac, casting="unsafe")
+
+        tables, deltas = wavetables(self.waveform)
+        lvl = mip_level(self.freq, self.sample_rate)
+
+        # out = t[i] + frac * dt[i]
+        tmp = self._tmp[:n]
+        np.take(deltas[lvl], idx, out=tmp)
+        tmp *= frac
+        res = self._out[:n]
+        np.take(tables[lvl], idx, out=res)
+        if out is None:
+            res += tmp
+            return res
+        return np.add(res, tmp, out=out)
+
+
+def wavetable_supersaw(freq, N, sr=44100, n=7, detune=0.01):
+    """Supersaw : n lectures désaccordées de la table saw."""
+    saw = WavetableOscillator(freq, sr, "saw")
+    sig = np.zeros(N, dtype=np.float32)
+    for i in range(n):
+        saw.freq = freq + (i - n/2) * detune * freq
+        saw.phase = 0.0
+        sig += saw.render(N)
+    sig /= n
+    return sig
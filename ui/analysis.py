@@ -0,0 +1,210 @@
+import numpy as np
+
+###############################################################################
+# SPECTRE (rfft fenêtrée)
+###############################################################################
+MAX_SAMPLES = 1 << 16   # ~1.5 s à 44.1 kHz : assez pour un signal périodique
+
+
+def _window(name, n):
+    if name is None or name == "rect":
+        return None
+    if name == "hamming":
+        return np.hamming(n)
+    if name == "blackman":
+        return np.blackman(n)
+    return np.hanning(n)
+
+
+def decimate(wave, factor):
+    """
+    Sous-échantillonnage entier avec moyenne glissante par paquets
+    (filtre anti-repliement minimal, suffisant pour l'analyse).
+    """
+    factor = int(factor)
+    if factor <= 1:
+        return wave
+    n = len(wave) // factor * factor
+    return wave[:n].reshape(-1, factor).mean(axis=1)
+
+
+def analysis_frame(wave, max_samples=MAX_SAMPLES):
+    """Tranche centrale du signal (un signal périodique n'a pas besoin de tout)."""
+    wave = np.asarray(wave)
+    if max_samples and len(wave) > max_samples:
+        start = (len(wave) - max_samples) // 2
+        wave = wave[start:start + max_samples]
+    if wave.ndim == 2:
+        wave = wave.mean(axis=1)
+    return wave.astype(np.float64, copy=False)
+
+
+def magnitude_spectrum(
+    wave,
+    sample_rate=44100,
+    window="hann",
+    decimation=1,
+    max_samples=MAX_SAMPLES
+):
+    """
+    Spectre d'amplitude positif via rfft.
+    Renvoie (freqs, mag, sample_rate effectif après décimation).
+    """
+    frame = decimate(analysis_frame(wave, max_samples), decimation)
+    sr = sample_rate / max(int(decimation), 1)
+
+    win = _window(window, len(frame))
+    if win is not None:
+        frame = frame * win
+        gain = win.sum()
+    else:
+        gain = len(frame)
+
+    mag = np.abs(np.fft.rfft(frame)) * (2.0 / max(gain, 1e-12))
+    freqs = np.fft.rfftfreq(len(frame), 1.0 / sr)
+    return freqs, mag, sr
+
+
+###############################################################################
+# PICS HARMONIQUES (vectorisé + interpolation parabolique)
+###############################################################################
+def parabolic_peaks(mag, idx):
+    """
+    Interpolation parabolique (sur log-amplitude) autour des bins idx.
+    Renvoie (décalage en bins, amplitude interpolée).
+    """
+    idx = np.clip(idx, 1, len(mag) - 2)
+    log = np.log(mag + 1e-12)
+    a, b, c = log[idx - 1], log[idx], log[idx + 1]
+    denom = a - 2 * b + c
+    safe = np.where(np.abs(denom) > 1e-12, denom, 1.0)
+    offset = np.where(np.abs(denom) > 1e-12, 0.5 * (a - c) / safe, 0.0)
+    offset = np.clip(offset, -0.5, 0.5)
+    amp = np.exp(b - 0.25 * (a - c) * offset)
+    return offset, amp
+
+
+def harmonic_peaks(freqs, mag, base_freq, max_harmonics=20, search_bins=2):
+    """
+    Amplitude et fréquence mesurées des harmoniques n × base_freq, en une
+    passe vectorisée : bin nominal → max local (± search_bins) →
+    interpolation parabolique. Les harmoniques au-delà de Nyquist valent 0.
+    """
+    df = freqs[1] - freqs[0]
+    nominal = base_freq * np.arange(1, max_harmonics + 1)
+    center = np.rint(nominal / df).astype(np.int64)
+    valid = (center > 0) & (center < len(mag) - 1)
+    center = np.clip(center, 1, len(mag) - 2)
+
+    # fenêtre de recherche (H × (2w+1)) → bin du max local
+    offsets = np.arange(-search_bins, search_bins + 1)
+    window = np.clip(center[:, None] + offsets[None, :], 1, len(mag) - 2)
+    peak = window[np.arange(len(center)), np.argmax(mag[window], axis=1)]
+
+    shift, amps = parabolic_peaks(mag, peak)
+    measured = (peak + shift) * df
+
+    amps = np.where(valid, amps, 0.0)
+    measured = np.where(valid, measured, nominal)
+    return measured, amps
+
+
+def refine_peak(freqs, mag, approx, tolerance=0.03):
+    """
+    Fréquence précise du pic spectral le plus proche de approx (± tolerance
+    relative). Sans approx : pic principal hors continu.
+    """
+    df = freqs[1] - freqs[0]
+    if approx is None:
+        peak = np.argmax(mag[1:]) + 1
+    else:
+        lo = max(int((approx * (1 - tolerance)) / df), 1)
+        hi = min(int(np.ceil(approx * (1 + tolerance) / df)) + 1, len(mag) - 1)
+        if hi <= lo:
+            return approx
+        peak = lo + np.argmax(mag[lo:hi])
+    shift, _ = parabolic_peaks(mag, np.array([peak]))
+    return float((peak + shift[0]) * df)
+
+
+###############################################################################
+# FONDAMENTALE (YIN)
+###############################################################################
+def estimate_f0(wave, sample_rate=44100, fmin=30.0, fmax=2000.0, threshold=0.15):
+    """
+    Estimation de la fondamentale par YIN : fonction de différence
+    normalisée (cumulée), calculée par FFT, premier creux sous le seuil,
+    affiné par interpolation parabolique. Renvoie None si aucun motif
+    périodique n'est trouvé (silence, bruit).
+    """
+    tau_max = int(sample_rate / fmin)
+    tau_min = max(int(sample_rate / fmax), 2)
+    w = tau_max * 2
+    x = analysis_frame(wave, w + tau_max)
+    if len(x) < w + tau_max:
+        w = len(x) - tau_max
+        if w <= tau_min:
+            return None
+    mid = (len(x) - (w + tau_max)) // 2
+    x = x[mid:mid + w + tau_max]
+
+    # d(τ) = Σ (x_j − x_{j+τ})²  sur j ∈ [0, w)
+    n_fft = 1 << int(np.ceil(np.log2(len(x) + w)))
+    spec_x = np.fft.rfft(x, n_fft)
+    spec_w = np.fft.rfft(x[:w], n_fft)
+    acf = np.fft.irfft(spec_x * np.conj(spec_w), n_fft)[:tau_max + 1]
+
+    sq = np.concatenate([[0.0], np.cumsum(x * x)])
+    energy0 = sq[w]
+    if energy0 <= 1e-12 * w:
+        return None
+    energy_tau = sq[w + np.arange(tau_max + 1)] - sq[np.arange(tau_max + 1)]
+    diff = energy0 + energy_tau - 2 * acf
+
+    # normalisation cumulée
+    cmnd = np.ones_like(diff)
+    tau = np.arange(1, tau_max + 1)
+    cumsum = np.cumsum(diff[1:])
+    cmnd[1:] = diff[1:] * tau / np.maximum(cumsum, 1e-12)
+
+    below = np.nonzero(cmnd[tau_min:] < threshold)[0]
+    if len(below) == 0:
+        return None
+    t = below[0] + tau_min
+    # descendre jusqu'au creux local
+    while t + 1 <= tau_max and cmnd[t + 1] < cmnd[t]:
+        t += 1
+
+    if 1 <= t < tau_max:
+        a, b, c = cmnd[t - 1], cmnd[t], cmnd[t + 1]
+        denom = a - 2 * b + c
+        t = t + (0.5 * (a - c) / denom if abs(denom) > 1e-12 else 0.0)
+    return sample_rate / t
+
+
+###############################################################################
+# ANALYSE COMPLÈTE
+###############################################################################
+def analyze_harmonics(
+    wave,
+    sample_rate=44100,
+    max_harmonics=20,
+    base_freq=None,
+    decimation=1,
+    window="hann",
+    max_samples=MAX_SAMPLES
+):
+    """
+    Sans base_freq : estimation YIN, affinée sur le pic spectral voisin.
+    Renvoie (base_freq, fréquences nominales n×f0, fréquences mesurées,
+    amplitudes normalisées).
+    """
+    freqs, mag, sr = magnitude_spectrum(wave, sample_rate, window, decimation, max_samples)
+
+    if base_freq is None:
+        base_freq = refine_peak(freqs, mag, estimate_f0(wave, sample_rate))
+
+    measured, amps = harmonic_peaks(freqs, mag, base_freq, max_harmonics)
+    amps = amps / (amps.max() + 1e-9)
+    nominal = base_freq * np.arange(1, max_harmonics + 1)
+    return base_freq, nominal, measured, amps
@@ -1,6 +1,7 @@
 import numpy as np
 import streamlit as st
-import matplotlib.pyplot as plt
+from ui.analysis import analyze_harmonics
+from ui.plot_cache import plot_key, show_plot
 
 
 ###############################################################################
@@ -13,7 +14,8 @@ def harmonic_analyzer(
     title="Analyse des harmoniques",
     base_freq=None,
     width=800,
-    height=350
+    height=350,
+    decimation=1
 ):
     """
     Analyse les partiels harmoniques d’un signal périodique.
@@ -21,57 +23,42 @@ def harmonic_analyzer(
     Si base_freq est donnée :
         → les harmoniques seront alignés sur n × base_freq
     Sinon :
-        → estimation automatique via autocorr + FFT peak detection
-    """
-
-    N = len(wave)
-    fft = np.fft.fft(wave)
-    freq = np.fft.fftfreq(N, 1/sample_rate)
-
-    # Keep positive frequencies
-    mask = freq > 0
-    freq = freq[mask]
-    mag = np.abs(fft[mask]) 
-
-    # Estimate base frequency if not provided
-    if base_freq is None:
-        # Find max peak (excluding sub-low noise)
-        idx = np.argmax(mag[1:]) + 1
-        base_freq = freq[idx]
-
-    # Build harmonic frequency list
-    harmonic_freqs = [base_freq * n for n in range(1, max_harmonics + 1)]
-    harmonic_amps = []
+        → estimation automatique (YIN + pic spectral interpolé)
 
-    for h in harmonic_freqs:
-        # Find FFT bin nearest to harmonic
-        idx = np.argmin(np.abs(freq - h))
-        harmonic_amps.append(mag[idx])
-
-    # Normalize amplitudes
-    harmonic_amps = np.array(harmonic_amps)
-    harmonic_amps = harmonic_amps / (harmonic_amps.max() + 1e-9)
-
-    # Plot
-    fig, ax = plt.subplots(figsize=(width/100, height/100))
+    decimation : facteur de sous-échantillonnage avant FFT (ex. 4 pour
+                 n'analyser que sous ~5.5 kHz)
+    """
 
-    ax.bar(
-        harmonic_freqs,
-        harmonic_amps,
-        width=base_freq * 0.8,
-        color=["#ffaa00" if i%2==0 else "#44ccff" for i in range(max_harmonics)],
-        edgecolor="black",
-        linewidth=0.6
+    base_freq, harmonic_freqs, _, harmonic_amps = analyze_harmonics(
+        wave,
+        sample_rate=sample_rate,
+        max_harmonics=max_harmonics,
+        base_freq=base_freq,
+        decimation=decimation,
     )
 
-    ax.set_title(title)
-    ax.set_xlabel("Fréquence (Hz)")
-    ax.set_ylabel("Amplitude (normalisée)")
+    # Plot (PNG en cache : même signal + mêmes params → pas de matplotlib)
+    def draw(fig, ax):
+        ax.bar(
+            harmonic_freqs,
+            harmonic_amps,
+            width=base_freq * 0.8,
+            color=["#ffaa00" if i%2==0 else "#44ccff" for i in range(max_harmonics)],
+            edgecolor="black",
+            linewidth=0.6
+        )
+
+        ax.set_title(title)
+        ax.set_xlabel("Fréquence (Hz)")
+        ax.set_ylabel("Amplitude (normalisée)")
 
-    # Optional: show grid
-    ax.grid(True, which="both", linestyle="--", linewidth=0.4)
+        # Optional: show grid
+        ax.grid(True, which="both", linestyle="--", linewidth=0.4)
 
-    st.pyplot(fig)
+    key = plot_key("harmonics", wave, sr=sample_rate, max_harmonics=max_harmonics,
+                   title=title, base_freq=base_freq, width=width, height=height,
+                   decimation=decimation)
+    show_plot(key, draw, width, height)
 
     # Display harmonic table
     st.markdown("### Détails des harmoniques")
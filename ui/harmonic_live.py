@@ -1,44 +1,147 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
 import time
-from ui.harmonic_analyzer import harmonic_analyzer
+from ui.analysis import estimate_f0, harmonic_peaks, refine_peak
 
 
+###############################################################################
+# RING BUFFER
+###############################################################################
+class RingBuffer:
+    """Derniers `capacity` échantillons reçus, sans réallocation."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buf = np.zeros(capacity)
+        self._out = np.zeros(capacity)
+        self._pos = 0
+        self.filled = 0
+
+    def push(self, samples):
+        samples = np.asarray(samples)
+        if samples.ndim == 2:
+            samples = samples.mean(axis=1)
+        samples = samples[-self.capacity:]
+        n = len(samples)
+
+        first = min(n, self.capacity - self._pos)
+        self._buf[self._pos:self._pos + first] = samples[:first]
+        self._buf[:n - first] = samples[first:]
+
+        self._pos = (self._pos + n) % self.capacity
+        self.filled = min(self.filled + n, self.capacity)
+
+    def latest(self):
+        """Contenu dans l'ordre chronologique (buffer interne réutilisé)."""
+        tail = self.capacity - self._pos
+        self._out[:tail] = self._buf[self._pos:]
+        self._out[tail:] = self._buf[:self._pos]
+        return self._out
+
+
+###############################################################################
+# GRAPHIQUE LÉGER (Vega-Lite : spec fixe + une vingtaine de valeurs)
+###############################################################################
+BAR_COLORS = ("#ffaa00", "#44ccff")
+
+
+def harmonic_bars_spec(title):
+    """
+    Spec Vega-Lite des barres d'harmoniques : échelle fixe (0–1.05) et
+    couleurs alternées. Le navigateur redessine les barres lui-même, rien
+    n'est rasterisé côté serveur.
+    """
+    return {
+        "title": title,
+        "height": 260,
+        "mark": {"type": "bar", "stroke": "black", "strokeWidth": 0.6},
+        "encoding": {
+            "x": {"field": "harmonique", "type": "ordinal", "title": "Harmonique (n × f0)",
+                  "axis": {"labelAngle": 0}},
+            "y": {"field": "amplitude", "type": "quantitative", "title": "Amplitude (normalisée)",
+                  "scale": {"domain": [0, 1.05]}},
+            "color": {"field": "couleur", "type": "nominal", "scale": None, "legend": None},
+        },
+    }
+
+
+###############################################################################
+# ANALYSEUR TEMPS RÉEL
+###############################################################################
 def harmonic_analyzer_live(
     get_wave_fn,
     duration=5.0,
     fps=5,
     sample_rate=44100,
     base_freq=None,
-    max_harmonics=20
+    max_harmonics=20,
+    n_fft=8192,
+    smoothing=0.5
 ):
     """
-    get_wave_fn : fonction → retourne une waveform numpy
+    get_wave_fn : fonction → renvoie les NOUVEAUX échantillons depuis le
+                  dernier appel (un bloc numpy) ; un buffer complet marche
+                  aussi, seule la fin est gardée
     duration    : temps total de monitoring
-    fps         : nombre d’analyses/sec
-    """
+    fps         : nombre d’analyses/sec (20–30 possible)
+    n_fft       : taille de la trame STFT (ring buffer)
+    smoothing   : lissage exponentiel des amplitudes entre trames (0–1)
 
+    Chaque trame n'envoie au navigateur que la spec Vega-Lite et les
+    max_harmonics amplitudes (pas d'image PNG) ; le tableau n'est réécrit
+    que si les valeurs arrondies changent.
+    """
     refresh_interval = 1.0 / fps
-    placeholder = st.empty()
+    ring = RingBuffer(n_fft)
+    window = np.hanning(n_fft)
+    frame = np.empty(n_fft)
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    harmonics = np.arange(1, max_harmonics + 1)
+    colors = [BAR_COLORS[i % 2] for i in range(max_harmonics)]
 
+    status = st.empty()
+    chart = st.empty()
+    table = st.empty()
+
+    smoothed = np.zeros(max_harmonics)
+    shown = None
     start = time.time()
 
     while time.time() - start < duration:
+        tick = time.time()
 
         wave = get_wave_fn()
         if wave is None or len(wave) == 0:
-            placeholder.warning("Aucun signal reçu.")
+            status.warning("Aucun signal reçu.")
             time.sleep(refresh_interval)
             continue
+        status.empty()
+
+        ring.push(wave)
+        samples = ring.latest()
+        np.multiply(samples, window, out=frame)
+        mag = np.abs(np.fft.rfft(frame))
+
+        f0 = base_freq
+        if f0 is None:
+            f0 = refine_peak(freqs, mag, estimate_f0(samples, sample_rate))
+
+        _, amps = harmonic_peaks(freqs, mag, f0, max_harmonics)
+        amps /= amps.max() + 1e-9
+        smoothed *= smoothing
+        smoothed += (1 - smoothing) * amps
+
+        chart.vega_lite_chart(
+            {"harmonique": harmonics, "amplitude": smoothed, "couleur": colors},
+            harmonic_bars_spec(f"Analyse harmonique — Temps réel — f0 = {f0:.2f} Hz"),
+        )
 
-        with placeholder.container():
-            harmonic_analyzer(
-                wave,
-                sample_rate=sample_rate,
-                base_freq=base_freq,
-                max_harmonics=max_harmonics,
-                title="Analyse harmonique — Temps réel"
+        rounded = np.round(smoothed, 3)
+        if shown is None or not np.array_equal(rounded, shown):
+            shown = rounded
+            table.dataframe(
+                {"Fréquence (Hz)": np.round(harmonics * f0, 2), "Amplitude": rounded},
+                hide_index=True,
             )
 
-        time.sleep(refresh_interval)
+        time.sleep(max(0.0, refresh_interval - (time.time() - tick)))
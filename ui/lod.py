@@ -0,0 +1,119 @@
+import numpy as np
+
+###############################################################################
+# PYRAMIDE MIN/MAX (niveaux de détail pour l'affichage)
+###############################################################################
+class MinMaxPyramid:
+    """
+    Enveloppes min/max d'une forme d'onde à plusieurs résolutions,
+    construites une seule fois.
+
+    Le niveau k regroupe base_block × 2**k échantillons par colonne. Pour
+    une fenêtre [t0, t1] affichée sur `columns` pixels, view() renvoie le
+    niveau le plus grossier qui garde au moins une colonne par pixel, ou
+    les échantillons bruts si la fenêtre est assez courte.
+
+    levels : niveaux déjà calculés pour ce même contenu (cache), réutilisés
+    tels quels au lieu d'être reconstruits.
+    """
+
+    def __init__(self, wave, sample_rate=44100, base_block=64, levels=None):
+        wave = np.asarray(wave)
+        if wave.ndim == 2:
+            wave = wave.mean(axis=1)
+        self.wave = wave
+        self.sample_rate = sample_rate
+        self.base_block = base_block
+        self.levels = []   # [(mins, maxs)]
+
+        if levels is not None:
+            self.levels = levels
+            return
+
+        n = len(wave) // base_block * base_block
+        if n == 0:
+            return
+        blocks = wave[:n].reshape(-1, base_block)
+        mins, maxs = blocks.min(axis=1), blocks.max(axis=1)
+        # queue incomplète
+        if n < len(wave):
+            mins = np.append(mins, wave[n:].min())
+            maxs = np.append(maxs, wave[n:].max())
+        self.levels.append((mins, maxs))
+
+        while len(mins) > 1:
+            if len(mins) % 2:
+                mins, maxs = np.append(mins, mins[-1]), np.append(maxs, maxs[-1])
+            mins = np.minimum(mins[0::2], mins[1::2])
+            maxs = np.maximum(maxs[0::2], maxs[1::2])
+            self.levels.append((mins, maxs))
+
+    @property
+    def duration(self):
+        return len(self.wave) / self.sample_rate
+
+    def view(self, t0=0.0, t1=None, columns=1000):
+        """
+        Renvoie (temps, mins, maxs) pour la fenêtre [t0, t1] secondes.
+        Au niveau brut, mins et maxs sont les mêmes échantillons.
+        """
+        t1 = self.duration if t1 is None else t1
+        s0 = max(int(t0 * self.sample_rate), 0)
+        s1 = min(int(np.ceil(t1 * self.sample_rate)), len(self.wave))
+        span = max(s1 - s0, 1)
+
+        if span <= 2 * columns or span < columns * self.base_block or not self.levels:
+            seg = self.wave[s0:s1]
+            times = (s0 + np.arange(len(seg))) / self.sample_rate
+            return times, seg, seg
+
+        # plus grand bloc tel que span / bloc >= columns
+        level = int(np.floor(np.log2(max(span / columns / self.base_block, 1.0))))
+        level = min(level, len(self.levels) - 1)
+        block = self.base_block << level
+
+        mins, maxs = self.levels[level]
+        b0, b1 = s0 // block, min(-(-s1 // block), len(mins))
+        times = (np.arange(b0, b1) * block + block / 2) / self.sample_rate
+        return times, mins[b0:b1], maxs[b0:b1]
+
+
+###############################################################################
+# DÉCIMATION DE SPECTRES (max par colonne, pics préservés)
+###############################################################################
+def decimate_max(x, y, columns=1000):
+    """Garde le max de y par groupe de points pour ~columns colonnes."""
+    factor = len(y) // columns
+    if factor <= 1:
+        return x, y
+    n = len(y) // factor * factor
+    return x[:n:factor], y[:n].reshape(-1, factor).max(axis=1)
+
+
+def stft_frames(wave, sample_rate=44100, n_fft=2048, noverlap=1024, columns=1000):
+    """
+    Spectrogramme en dB limité à ~columns trames : le pas entre trames est
+    élargi pour les signaux longs au lieu de calculer puis jeter des
+    dizaines de milliers de trames.
+    Renvoie (temps, fréquences, dB (fréquences × trames)).
+    """
+    wave = np.asarray(wave)
+    if wave.ndim == 2:
+        wave = wave.mean(axis=1)
+    if len(wave) < n_fft:
+        wave = np.pad(wave, (0, n_fft - len(wave)))
+
+    hop = max(n_fft - noverlap, int(np.ceil((len(wave) - n_fft) / max(columns, 1))), 1)
+    starts = np.arange(0, len(wave) - n_fft + 1, hop)
+    frames = np.lib.stride_tricks.as_strided(
+        wave,
+        shape=(len(starts), n_fft),
+        strides=(wave.strides[0] * hop, wave.strides[0]),
+        writeable=False,
+    )
+    spec = np.abs(np.fft.rfft(frames * np.hanning(n_fft), axis=1)).T
+    db = 20 * np.log10(spec + 1e-9)
+
+    times = (starts + n_fft / 2) / sample_rate
+    freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    return times, freqs, db
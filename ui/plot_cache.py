@@ -0,0 +1,139 @@
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from importlib.metadata import version
+from io import BytesIO
+
+import numpy as np
+import streamlit as st
+
+###############################################################################
+# EMPREINTE DES FORMES D'ONDE
+###############################################################################
+_DIGESTS = []       # [(weakref du tableau, digest)] pour les tableaux figés
+_MAX_DIGESTS = 8
+_digests_lock = threading.Lock()
+
+
+def is_frozen(wave):
+    """
+    Contenu immuable : le tableau et toute sa chaîne de bases sont en
+    lecture seule (une vue read-only d'un tableau modifiable ne l'est pas).
+    """
+    while isinstance(wave, np.ndarray):
+        if wave.flags.writeable:
+            return False
+        wave = wave.base
+    return True
+
+
+def wave_digest(wave):
+    """
+    Hash du contenu (dtype, forme, octets). Les tableaux figés (cache de
+    notes, etc.) ne sont hachés qu'une fois ; le mémo ne garde qu'une
+    référence faible, il ne retient pas les formes d'onde en mémoire.
+    """
+    wave = np.asarray(wave)
+    frozen = is_frozen(wave)
+    if frozen:
+        with _digests_lock:
+            for ref, digest in _DIGESTS:
+                if ref() is wave:
+                    return digest
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{wave.dtype.str}{wave.shape}".encode())
+    h.update(np.ascontiguousarray(wave).data)
+    digest = h.hexdigest()
+
+    if frozen:
+        with _digests_lock:
+            _DIGESTS[:] = [(ref, d) for ref, d in _DIGESTS if ref() is not None]
+            _DIGESTS.insert(0, (weakref.ref(wave), digest))
+            del _DIGESTS[_MAX_DIGESTS:]
+    return digest
+
+
+###############################################################################
+# CYCLE DE VIE DES FIGURES
+###############################################################################
+@contextmanager
+def figure(width=800, height=200):
+    """plt.subplots(...) toujours refermé, même en cas d'exception."""
+    # matplotlib (~0.5 s) n'est chargé qu'au premier rendu réel
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(width/100, height/100))
+    try:
+        yield fig, ax
+    finally:
+        plt.close(fig)
+
+
+def render_png(draw_fn, width=800, height=200, dpi=100):
+    with figure(width, height) as (fig, ax):
+        draw_fn(fig, ax)
+        buf = BytesIO()
+        fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+    return buf.getvalue()
+
+
+###############################################################################
+# CACHE PNG
+###############################################################################
+class PlotCache:
+    """Images PNG rasterisées, LRU borné en octets."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, render_fn):
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+            self.misses += 1
+
+        png = render_fn()
+
+        with self._lock:
+            if key not in self._entries and len(png) <= self.max_bytes:
+                self._entries[key] = png
+                self.nbytes += len(png)
+                while self.nbytes > self.max_bytes:
+                    _, old = self._entries.popitem(last=False)
+                    self.nbytes -= len(old)
+        return png
+
+
+PLOT_CACHE = PlotCache()
+
+
+@lru_cache(maxsize=None)
+def _matplotlib_version():
+    """Version lue dans les métadonnées, sans importer matplotlib."""
+    return version("matplotlib")
+
+
+def plot_key(kind, wave, **params):
+    payload = repr((kind, wave_digest(wave), sorted(params.items()), _matplotlib_version()))
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def show_plot(key, draw_fn, width=800, height=200):
+    """
+    Affiche le PNG en cache pour key ; draw_fn(fig, ax) n'est appelé
+    (et matplotlib utilisé) qu'en cas d'absence.
+    """
+    png = PLOT_CACHE.get(key, lambda: render_png(draw_fn, width, height))
+    st.image(png)
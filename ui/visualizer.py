@@ -1,22 +1,86 @@
+import threading
+from collections import OrderedDict
+
 import numpy as np
 import streamlit as st
-import matplotlib.pyplot as plt
+from ui.lod import MinMaxPyramid, decimate_max, stft_frames
+from ui.plot_cache import plot_key, show_plot, wave_digest
+
+
+###############################################################################
+# PYRAMIDES (une par forme d'onde affichée)
+###############################################################################
+# Niveaux min/max par contenu (digest) : un tableau modifié sur place
+# change de clé, et le cache ne garde pas les formes d'onde elles-mêmes
+_PYRAMIDS = OrderedDict()   # (digest, sample_rate) → levels
+_MAX_PYRAMIDS = 4
+_pyramids_lock = threading.Lock()
+
+
+def get_pyramid(wave, sample_rate=44100):
+    """Pyramide min/max de wave, construite une seule fois par contenu."""
+    key = (wave_digest(wave), sample_rate)
+    with _pyramids_lock:
+        levels = _PYRAMIDS.get(key)
+        if levels is not None:
+            _PYRAMIDS.move_to_end(key)
+            return MinMaxPyramid(wave, sample_rate, levels=levels)
+
+    pyramid = MinMaxPyramid(wave, sample_rate)
+    with _pyramids_lock:
+        _PYRAMIDS[key] = pyramid.levels
+        while len(_PYRAMIDS) > _MAX_PYRAMIDS:
+            _PYRAMIDS.popitem(last=False)
+    return pyramid
 
 
 ###############################################################################
 # OSCILLOSCOPE
 ###############################################################################
-def oscilloscope(wave, sample_rate=44100, title="Oscilloscope", width=800, height=200):
-    t = np.linspace(0, len(wave)/sample_rate, len(wave))
+def oscilloscope(wave, sample_rate=44100, title="Oscilloscope", width=800, height=200,
+                 t0=0.0, t1=None):
+
+    def draw(fig, ax):
+        t, mins, maxs = get_pyramid(wave, sample_rate).view(t0, t1, columns=width)
+        if mins is maxs:
+            ax.plot(t, mins, linewidth=1.0, color="#00ccff")
+        else:
+            # enveloppe min/max par colonne de pixels
+            ax.fill_between(t, mins, maxs, linewidth=0.5, color="#00ccff")
+        ax.set_title(title)
+        ax.set_xlabel("Temps (s)")
+        ax.set_ylabel("Amplitude")
+        ax.grid(True, color="#333")
+
+    key = plot_key("oscilloscope", wave, sr=sample_rate, title=title,
+                   width=width, height=height, t0=t0, t1=t1)
+    show_plot(key, draw, width, height)
+
 
-    fig, ax = plt.subplots(figsize=(width/100, height/100))
-    ax.plot(t, wave, linewidth=1.0, color="#00ccff")
-    ax.set_title(title)
-    ax.set_xlabel("Temps (s)")
-    ax.set_ylabel("Amplitude")
-    ax.grid(True, color="#333")
+def oscilloscope_interactive(wave, sample_rate=44100, title="Oscilloscope", width=800,
+                             height=300, key="osc_zoom"):
+    """
+    Oscilloscope plotly (WebGL). Le zoom se choisit avec le curseur : seul
+    le niveau de la pyramide correspondant à la fenêtre est envoyé.
+    """
+    import plotly.graph_objects as go
 
-    st.pyplot(fig)
+    pyramid = get_pyramid(wave, sample_rate)
+    total = max(pyramid.duration, 1e-3)
+    t0, t1 = st.slider("Fenêtre (s)", 0.0, total, (0.0, total), key=key)
+
+    t, mins, maxs = pyramid.view(t0, t1, columns=width)
+
+    fig = go.Figure()
+    if mins is maxs:
+        fig.add_trace(go.Scattergl(x=t, y=mins, mode="lines", line=dict(color="#00ccff", width=1)))
+    else:
+        fig.add_trace(go.Scattergl(x=t, y=maxs, mode="lines", line=dict(color="#00ccff", width=0.5)))
+        fig.add_trace(go.Scattergl(x=t, y=mins, mode="lines", fill="tonexty",
+                                   line=dict(color="#00ccff", width=0.5)))
+    fig.update_layout(title=title, width=width, height=height, showlegend=False,
+                      xaxis_title="Temps (s)", yaxis_title="Amplitude")
+    st.plotly_chart(fig)
 
 
 ###############################################################################
@@ -24,24 +88,23 @@ def oscilloscope(wave, sample_rate=44100, title="Oscilloscope", width=800, heigh
 ###############################################################################
 def spectrum_fft(wave, sample_rate=44100, title="Spectrum FFT", width=800, height=200):
 
-    N = len(wave)
-    fft = np.fft.fft(wave)
-    freq = np.fft.fftfreq(N, d=1/sample_rate)
+    def draw(fig, ax):
+        # rfft : fréquences positives uniquement
+        fft = np.abs(np.fft.rfft(wave))
+        freq = np.fft.rfftfreq(len(wave), d=1/sample_rate)
 
-    # On ne garde que les positives
-    pos_mask = freq >= 0
-    freq = freq[pos_mask]
-    fft = np.abs(fft[pos_mask])
+        # un point (max) par colonne de pixels
+        freq, fft = decimate_max(freq, fft, columns=2 * width)
 
-    fig, ax = plt.subplots(figsize=(width/100, height/100))
-    ax.plot(freq, fft, color="#ff8800", linewidth=1.2)
-    ax.set_title(title)
-    ax.set_xlabel("Fréquence (Hz)")
-    ax.set_ylabel("Amplitude")
-    ax.set_xlim(0, sample_rate/2)
-    ax.grid(True, color="#333")
+        ax.plot(freq, fft, color="#ff8800", linewidth=1.2)
+        ax.set_title(title)
+        ax.set_xlabel("Fréquence (Hz)")
+        ax.set_ylabel("Amplitude")
+        ax.set_xlim(0, sample_rate/2)
+        ax.grid(True, color="#333")
 
-    st.pyplot(fig)
+    key = plot_key("spectrum", wave, sr=sample_rate, title=title, width=width, height=height)
+    show_plot(key, draw, width, height)
 
 
 ###############################################################################
@@ -49,16 +112,13 @@ def spectrum_fft(wave, sample_rate=44100, title="Spectrum FFT", width=800, heigh
 ###############################################################################
 def spectrogram(wave, sample_rate=44100, title="Spectrogram", width=800, height=300):
 
-    fig, ax = plt.subplots(figsize=(width/100, height/100))
-    ax.specgram(
-        wave,
-        Fs=sample_rate,
-        NFFT=2048,
-        noverlap=1024,
-        cmap="inferno"
-    )
-    ax.set_title(title)
-    ax.set_xlabel("Temps (s)")
-    ax.set_ylabel("Fréquence (Hz)")
-
-    st.pyplot(fig)
+    def draw(fig, ax):
+        # au plus une trame STFT par colonne de pixels
+        t, f, db = stft_frames(wave, sample_rate, n_fft=2048, noverlap=1024, columns=width)
+        ax.pcolormesh(t, f, db, cmap="inferno", shading="auto")
+        ax.set_title(title)
+        ax.set_xlabel("Temps (s)")
+        ax.set_ylabel("Fréquence (Hz)")
+
+    key = plot_key("spectrogram", wave, sr=sample_rate, title=title, width=width, height=height)
+    show_plot(key, draw, width, height)